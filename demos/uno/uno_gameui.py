@@ -36,18 +36,14 @@ class UnoGameUI:
 
     @classmethod
     def _load_card_images(cls):
-        image = load_image("../../resources/UNO_cards_deck.png")
-        cardsize = UnoGameUI.CARDSIZE
-        cards = {}
+        names = {}
         for y, color in enumerate(['rot', 'gelb', 'grün', 'blau']):
             for x in range(13):
-                r = Rect(x*cardsize[0], y*cardsize[1], cardsize[0], cardsize[1])
-                name = UnoGameUI.NAMES[x] + "-" + color
-                cards[name] = image.subsurface(r)
-        cards["PC"] = image.subsurface(Rect(13*cardsize[0], 0, cardsize[0], cardsize[1]))
-        cards["+4"] = image.subsurface(Rect(13*cardsize[0], 4*cardsize[1], cardsize[0], cardsize[1]))
-        cards["backface"] = image.subsurface(Rect(0, 7*cardsize[1], cardsize[0], cardsize[1]))
-        return cards
+                names[UnoGameUI.NAMES[x] + "-" + color] = (x, y)
+        names["PC"] = (13, 0)
+        names["+4"] = (13, 4)
+        names["backface"] = (0, 7)
+        return TextureAtlas.from_grid("../../resources/UNO_cards_deck.png", UnoGameUI.CARDSIZE, names)
 
     def get_card_image(self, card):
         name = card.symbol + "-" + card.farbe
@@ -64,8 +60,7 @@ class UnoGameUI:
         offset = min(UnoGameUI.AI_PLAYER_MAX_CARD_SPACE / (ncards+1), UnoGameUI.CARDSIZE[0]/2)
         horizontal_space = offset*(ncards+1)
         card_image = UnoGameUI.CARDS["backface"]
-        for i in range(ncards):
-            draw_surface(card_image, (position[0]-horizontal_space/2+i*offset, position[1]))
+        draw_surfaces([(card_image, (position[0]-horizontal_space/2+i*offset, position[1])) for i in range(ncards)])
         # we should display some text giving the full number of cards
 
     def display_open_hand(self, player):
@@ -77,9 +72,8 @@ class UnoGameUI:
         position = UnoGameUI.PLAYER_HAND_POSITIONS[player]
         ncards = hand_of_cards.wieviele()
         horizontal_space = UnoGameUI.CARDSIZE[0]/2*(ncards+1)
-        for i, card in enumerate(hand_of_cards.liste_der_karten()):
-            image = self.get_card_image(card)
-            draw_surface(image, (position[0]-horizontal_space/2+i*UnoGameUI.CARDSIZE[0]/2, position[1]))
+        draw_surfaces([(self.get_card_image(card), (position[0]-horizontal_space/2+i*UnoGameUI.CARDSIZE[0]/2, position[1]))
+                       for i, card in enumerate(hand_of_cards.liste_der_karten())])
 
     def display_last_played_card(self):
         """
@@ -1,15 +1,215 @@
 import pygame.draw as draw
 import pygame.font
 from pygame.math import Vector2
+from collections import OrderedDict
 
-font_cache = {}
+try:
+    import numpy as _np
+    import pygame.surfarray
+except ImportError:
+    _np = None
+
+
+class FontCache:
+    """
+    LRU cache of font objects, keyed by (fontname, size).
+
+    If max_fonts is given, the least recently used fonts are dropped once more fonts are cached.
+    """
+
+    def __init__(self, max_fonts=None):
+        self.max_fonts = max_fonts
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._fonts = OrderedDict()
+
+    def get(self, fontname, size=16):
+        key = _font_key(fontname, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            self._fonts.move_to_end(key)
+            self.hits += 1
+            return font
+        self.misses += 1
+        font = pygame.font.Font(key[0], key[1])
+        self._fonts[key] = font
+        self._trim()
+        return font
+
+    def preload(self, fonts):
+        """
+        Loads the given (fontname, size) pairs into the cache without counting them as misses.
+        """
+        for fontname, size in fonts:
+            key = _font_key(fontname, size)
+            if key not in self._fonts:
+                self._fonts[key] = pygame.font.Font(key[0], key[1])
+        self._trim()
+
+    def set_max_fonts(self, max_fonts):
+        self.max_fonts = max_fonts
+        self._trim()
+
+    def clear(self):
+        self._fonts.clear()
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._fonts), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def _trim(self):
+        if self.max_fonts is None:
+            return
+        while len(self._fonts) > self.max_fonts:
+            self._fonts.popitem(last=False)
+            self.evictions += 1
+
+
+def _font_key(fontname, size):
+    # None and the name of pygame's default font both mean the default font. pygame wants integer
+    # sizes, and rounding here keeps zooming text from creating a new font for every float size.
+    if fontname == pygame.font.get_default_font():
+        fontname = None
+    return (fontname, max(1, int(round(size))))
+
+
+class TextCache:
+    """
+    LRU cache of rendered text surfaces, keyed by (font, text, color, background, antialias).
+
+    The total size of the cached surfaces is limited to budget bytes.
+    """
+
+    def __init__(self, budget=8 * 1024 * 1024):
+        self.budget = budget
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def render(self, font, text, color, antialias=True, background=None):
+        key = (font, text, _color_key(color), _color_key(background), antialias)
+        surface = self._entries.get(key)
+        if surface is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color, background)
+        nbytes = _surface_bytes(surface)
+        if nbytes > self.budget:
+            return surface
+        self._entries[key] = surface
+        self.used += nbytes
+        while self.used > self.budget:
+            self._evict_oldest()
+        return surface
+
+    def set_budget(self, budget):
+        self.budget = budget
+        while self.used > self.budget and self._entries:
+            self._evict_oldest()
+
+    def clear(self):
+        self._entries.clear()
+        self.used = 0
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._entries), 'bytes': self.used, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+    def _evict_oldest(self):
+        key, surface = self._entries.popitem(last=False)
+        self.used -= _surface_bytes(surface)
+        self.evictions += 1
+
+
+class SpriteBatch:
+    """
+    Collects blits and performs them all with a single Surface.blits call.
+
+    Add sprites with add() while drawing, then call flush() once. If no target surface is given,
+    the display surface is drawn onto. A SpriteBatch can be used as a context manager which
+    flushes it at the end of the with block.
+    """
+
+    def __init__(self, target=None):
+        self.target = target
+        self.sprites = []
+
+    def add(self, surface, position, area=None):
+        if area is None:
+            self.sprites.append((surface, position))
+        else:
+            self.sprites.append((surface, position, area))
+
+    def extend(self, blit_sequence):
+        """
+        Adds (surface, position) or (surface, position, area) tuples.
+        """
+        self.sprites.extend(blit_sequence)
+
+    def flush(self, target=None):
+        """
+        Draws all collected sprites onto target (or the batch's own target) and empties the batch.
+        """
+        if target is None:
+            target = self.target if self.target is not None else pygame.display.get_surface()
+        if self.sprites:
+            target.blits(self.sprites, doreturn=False)
+            self.sprites.clear()
+
+    def clear(self):
+        self.sprites.clear()
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.clear()
+
+
+def _color_key(color):
+    # pygame Colors aren't hashable, and equal colors can be given in several ways
+    if color is None or type(color) is tuple:
+        return color
+    return tuple(pygame.Color(color))
+
+def _surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+
+font_cache = FontCache()
+text_cache = TextCache()
 
 def get_font(fontname, size=16):
-    key = "{}-{}".format(fontname, size)
-    if key not in font_cache:
-        font = pygame.font.Font(fontname, size)
-        font_cache[key] = font
-    return font_cache[key]
+    return font_cache.get(fontname, size)
+
+def preload_fonts(fonts):
+    """
+    Loads a list of (fontname, size) pairs ahead of time, e.g. while the program starts.
+    """
+    font_cache.preload(fonts)
+
+def set_font_cache_limit(max_fonts):
+    """
+    Sets the maximum number of cached fonts. None means no limit.
+    """
+    font_cache.set_max_fonts(max_fonts)
+
+def get_font_cache_stats() -> dict:
+    """
+    Returns the number of entries, hits, misses and evictions of the font cache.
+    """
+    return font_cache.get_stats()
 
 def get_fontnames():
     return pygame.font.get_fonts()
@@ -38,10 +238,215 @@ def draw_circle(surface, center, radius, color, width=1):
 def draw_filled_circle(surface, center, radius, color):
     draw.circle(surface, color, center, radius)
 
+def draw_surface(surface, source_surface, position, source_area=None):
+    surface.blit(source_surface, position, source_area)
+
+def draw_surfaces(surface, blit_sequence):
+    """
+    Draws a sequence of (source_surface, position) or (source_surface, position, source_area) tuples
+    onto surface in one go, which is much faster than drawing them one by one.
+    """
+    surface.blits(blit_sequence, doreturn=False)
+
 def draw_text(font, text, color, antialias=True, background=None):
     return font.render(text, antialias, color, background)
 
+def draw_text_cached(font, text, color, antialias=True, background=None):
+    """
+    Like draw_text, but the surface comes from the shared text cache. It must not be modified.
+    """
+    return text_cache.render(font, text, color, antialias, background)
+
+def set_text_cache_budget(nbytes):
+    """
+    Sets the maximum number of bytes the cached text surfaces may use together.
+    """
+    text_cache.set_budget(nbytes)
+
+def get_text_cache_stats() -> dict:
+    """
+    Returns the number of entries, bytes used, hits, misses and evictions of the text cache.
+    """
+    return text_cache.get_stats()
+
 def get_text_size(font, text) -> Vector2:
     return Vector2(font.size(text))
 
 
+# Batch drawing. These functions draw many primitives from NumPy arrays or plain sequences in one
+# call, and need numpy. Points and short segments are written into the surface with a few NumPy
+# operations; the other primitives are drawn with pygame's own functions, which are faster for them.
+#
+# Colors can be given as a single color for all primitives, a sequence of colors, an (n, 3) or
+# (n, 4) array of RGB(A) values, or a sequence of colors packed as 0xRRGGBB integers.
+
+def draw_points(surface, points, colors):
+    """
+    Sets the pixels at the given (n, 2) array of points.
+    """
+    points = _np.asarray(points)
+    if len(points) == 0:
+        return
+    xy = _np.floor(points).astype(_np.intp)
+    put_pixels(surface, xy[:, 0], xy[:, 1], _pack_colors(colors, len(points)))
+
+def draw_segments(surface, starts, ends, colors):
+    """
+    Draws one pixel wide lines from each of the (n, 2) starts to the corresponding end.
+    """
+    starts = _np.floor(_np.asarray(starts)).astype(_np.intp)
+    ends = _np.floor(_np.asarray(ends)).astype(_np.intp)
+    n = len(starts)
+    if n == 0:
+        return
+    colors = _pack_colors(colors, n)
+    deltas = ends - starts
+    steps = _np.abs(deltas).max(axis=1)
+    # rasterizing with NumPy costs per pixel, draw.line costs per call, so only short segments
+    # are worth rasterizing here
+    is_long = steps >= _SHORT_SEGMENT_PIXELS
+    if is_long.any():
+        long_colors = _unpack_colors(colors[is_long] if _np.ndim(colors) else colors)
+        if _np.ndim(colors):
+            for start, end, color in zip(starts[is_long].tolist(), ends[is_long].tolist(), long_colors):
+                draw.line(surface, color, start, end)
+        else:
+            for start, end in zip(starts[is_long].tolist(), ends[is_long].tolist()):
+                draw.line(surface, long_colors, start, end)
+        short = ~is_long
+        starts = starts[short]
+        deltas = deltas[short]
+        steps = steps[short]
+        if _np.ndim(colors):
+            colors = colors[short]
+        n = len(starts)
+        if n == 0:
+            return
+    # every short segment is rasterized as steps + 1 equally spaced points, where steps is the
+    # length of its longer axis. The points of all segments are generated together.
+    counts = steps + 1
+    segment = _np.repeat(_np.arange(n), counts)
+    first = _np.cumsum(counts) - counts
+    t = (_np.arange(counts.sum()) - first[segment]) / _np.maximum(steps, 1)[segment]
+    x = starts[segment, 0] + _np.rint(deltas[segment, 0] * t).astype(_np.intp)
+    y = starts[segment, 1] + _np.rint(deltas[segment, 1] * t).astype(_np.intp)
+    if _np.ndim(colors):
+        colors = colors[segment]
+    put_pixels(surface, x, y, colors)
+
+# segments at least this many pixels long are drawn with draw.line
+_SHORT_SEGMENT_PIXELS = 12
+
+def draw_filled_rects(surface, rects, colors):
+    """
+    Fills the given (n, 4) array of (x, y, width, height) rectangles. This is a loop over
+    Surface.fill, so it is no faster than calling draw_filled_rect for each rectangle.
+    """
+    rects = _np.asarray(rects).tolist()
+    colors = _pack_colors(colors, len(rects))
+    fill = surface.fill
+    if _np.ndim(colors):
+        for rect, color in zip(rects, _unpack_colors(colors)):
+            fill(color, rect)
+    else:
+        color = _unpack_colors(colors)
+        for rect in rects:
+            fill(color, rect)
+
+def draw_filled_circles(surface, centers, radii, colors):
+    """
+    Draws filled circles at the (n, 2) centers with the given radii, which can be a single radius or
+    one per circle. Circles with a radius of zero or less are skipped. The circles are drawn with
+    draw.circle, which is faster than anything built from blits or NumPy.
+    """
+    centers = _np.floor(_np.asarray(centers)).astype(_np.intp)
+    n = len(centers)
+    if n == 0:
+        return
+    radii = _np.broadcast_to(_np.rint(radii).astype(_np.intp), (n,))
+    colors = _pack_colors(colors, n)
+    visible = radii > 0
+    if not visible.all():
+        centers = centers[visible]
+        radii = radii[visible]
+        if _np.ndim(colors):
+            colors = colors[visible]
+    circle = draw.circle
+    if _np.ndim(colors):
+        for center, radius, color in zip(centers.tolist(), radii.tolist(), _unpack_colors(colors)):
+            circle(surface, color, center, radius)
+    else:
+        color = _unpack_colors(colors)
+        for center, radius in zip(centers.tolist(), radii.tolist()):
+            circle(surface, color, center, radius)
+
+def _pack_colors(colors, n):
+    """
+    Returns colors as 0xRRGGBB: a scalar for a single color, an array of n values otherwise.
+    """
+    if _np is None:
+        raise ImportError("Batch drawing needs numpy. Install it with 'pip install numpy'.")
+    if isinstance(colors, (pygame.Color, str)):
+        return _np.uint32(_pack_rgb(pygame.Color(colors)))
+    try:
+        array = _np.asarray(colors)
+    except ValueError:
+        # colors of different lengths, e.g. RGB and RGBA tuples mixed
+        return _np.array([_pack_rgb(pygame.Color(color)) for color in colors], dtype=_np.uint32)
+    if array.ndim == 0:
+        # a single packed color
+        return _np.uint32(int(array) & 0xffffff)
+    if array.ndim == 2 and array.shape[-1] in (3, 4):
+        rgb = array[:, :3].astype(_np.uint32)
+        return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+    if array.ndim == 1 and array.dtype.kind in 'iuf':
+        if array.shape[0] in (3, 4) and array.max() <= 255 and array.min() >= 0:
+            # a single RGB(A) color. Packed colors that small would all be shades of blue.
+            return _np.uint32(_pack_rgb(pygame.Color(*map(int, array.tolist()))))
+        if array.dtype.kind in 'iu':
+            return array.astype(_np.uint32) & _np.uint32(0xffffff)
+    return _np.array([_pack_rgb(pygame.Color(color)) for color in colors], dtype=_np.uint32)
+
+def _pack_rgb(color):
+    return (color.r << 16) | (color.g << 8) | color.b
+
+def _unpack_colors(colors):
+    if _np.ndim(colors):
+        return [((c >> 16) & 0xff, (c >> 8) & 0xff, c & 0xff) for c in colors.tolist()]
+    c = int(colors)
+    return ((c >> 16) & 0xff, (c >> 8) & 0xff, c & 0xff)
+
+def put_pixels(surface, x, y, colors):
+    """
+    Writes colors, packed as 0xRRGGBB (a single value or one per pixel), into the pixels at the x
+    and y index arrays, skipping those outside the surface's clip area. The surface has to have
+    24 or 32 bits per pixel.
+    """
+    clip = surface.get_clip()
+    inside = (x >= clip.left) & (x < clip.right) & (y >= clip.top) & (y < clip.bottom)
+    if not inside.all():
+        x = x[inside]
+        y = y[inside]
+        if _np.ndim(colors):
+            colors = colors[inside]
+    masks = surface.get_masks()
+    if surface.get_bytesize() == 4 and masks[:3] == (0xff0000, 0xff00, 0xff):
+        # the usual 32 bit pixel format, in which colors can be written as they are
+        if masks[3]:
+            colors = colors | _np.uint32(masks[3])
+        pixels = pygame.surfarray.pixels2d(surface)
+        pixels[x, y] = colors
+        del pixels
+        return
+    # other pixel formats get the color channels written separately
+    rgb = _np.empty((_np.size(colors), 3), dtype=_np.uint8)
+    rgb[:, 0] = (colors >> 16) & 0xff
+    rgb[:, 1] = (colors >> 8) & 0xff
+    rgb[:, 2] = colors & 0xff
+    pixels = pygame.surfarray.pixels3d(surface)
+    pixels[x, y] = rgb
+    del pixels
+    if surface.get_flags() & pygame.SRCALPHA:
+        alpha = pygame.surfarray.pixels_alpha(surface)
+        alpha[x, y] = 255
+        del alpha
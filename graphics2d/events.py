@@ -4,22 +4,25 @@ import pygame.locals as _const
 _MOUSE_EVENTS = ['MOUSEMOTION', 'MOUSEBUTTONDOWN', 'MOUSEBUTTONUP']
 _TOUCH_EVENTS = ['FINGERMOTION', 'FINGERDOWN', 'FINGERUP', 'MULTIGESTURE']
 
-_pointer_events = []
-_mouse_events = []
-_touch_events = []
-_focus_events = [_const.KEYUP, _const.KEYDOWN, _const.TEXTINPUT]
-_touch_available = False
+# event categories returned by classify_event()
+EVENT_MOUSE = 'mouse'
+EVENT_TOUCH = 'touch'
+EVENT_FOCUS = 'focus'
+EVENT_OTHER = 'other'
 
-# Determine which pointer events are available
-for _name in _MOUSE_EVENTS:
-    if hasattr(_const, _name):
-        _mouse_events.append(getattr(_const, _name))
-        _pointer_events.append(getattr(_const, _name))
-for _name in _TOUCH_EVENTS:
-    if hasattr(_const, _name):
-        _touch_available = True
-        _pointer_events.append(getattr(_const, _name))
-        _touch_events.append(getattr(_const, _name))
+# Determine which pointer events are available. The sets are frozen because they are checked
+# several times for every event.
+_mouse_events = frozenset(getattr(_const, _name) for _name in _MOUSE_EVENTS if hasattr(_const, _name))
+_touch_events = frozenset(getattr(_const, _name) for _name in _TOUCH_EVENTS if hasattr(_const, _name))
+_pointer_events = _mouse_events | _touch_events
+_focus_events = frozenset((_const.KEYUP, _const.KEYDOWN, _const.TEXTINPUT))
+_touch_available = len(_touch_events) > 0
+
+# event type -> category
+_categories = {}
+_categories.update(dict.fromkeys(_mouse_events, EVENT_MOUSE))
+_categories.update(dict.fromkeys(_touch_events, EVENT_TOUCH))
+_categories.update(dict.fromkeys(_focus_events, EVENT_FOCUS))
 
 def is_pointer_event(event : pygame.event.Event):
     """
@@ -32,7 +35,7 @@ def is_touch_event(event : pygame.event.Event):
     """
     Returns True if the given event is a touch event
     """
-    return _touch_available and event in _touch_events
+    return event.type in _touch_events
 
 def is_focus_event(event : pygame.event.Event):
     """
@@ -51,17 +54,30 @@ def is_touch_supported() -> bool:
     """
     return _touch_available
 
+def classify_event(event: pygame.event.Event):
+    """
+    Returns the category of the event (EVENT_MOUSE, EVENT_TOUCH, EVENT_FOCUS or EVENT_OTHER)
+    together with its location, like get_event_location() does. This is cheaper than calling
+    the is_..._event() functions and get_event_location() one after another.
+    """
+    category = _categories.get(event.type, EVENT_OTHER)
+    if category is EVENT_MOUSE:
+        return category, event.pos
+    elif category is EVENT_TOUCH:
+        return category, _touch_location(event)
+    return category, None
+
 def get_event_location(event: pygame.event.Event):
     """
     Returns the location of an event (or None if the event has no
     location information attached to it)
     """
-    if is_touch_event(event):
-        return (event.x, event.y)
-    elif event.type in _mouse_events and event.type != _const.MOUSEWHEEL:
-        return event.pos
-    else:
-        return None
-
-
+    return classify_event(event)[1]
 
+def _touch_location(event):
+    # touch coordinates are normalized to the window size (0.0 to 1.0)
+    surface = pygame.display.get_surface()
+    if surface is None:
+        return (event.x, event.y)
+    width, height = surface.get_size()
+    return (event.x * width, event.y * height)
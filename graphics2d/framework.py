@@ -17,8 +17,9 @@ go()
 
 __all__ = [
     'go', 'request_redraw', 'get_runtime_in_msecs', 'get_window_size', 'get_window_width', 'get_window_height',
-    'set_window_title', 'get_window_surface', 'get_monitor_resolution', 'get_scenetree', 'listen', 
-    'defer_to_next_frame', 'VarContainer', 'CanvasItem', 'CanvasRectAreaItem', 'PanelContainer', 'HBoxContainer', 'VBoxContainer'
+    'get_interpolation_alpha', 'set_window_title', 'get_window_surface', 'get_monitor_resolution', 'get_scenetree', 'listen', 
+    'defer_to_next_frame', 'enable_profiler', 'disable_profiler', 'get_profiler', 'start_trace', 'stop_trace',
+    'run_frames', 'shutdown', 'VarContainer', 'CanvasItem', 'CanvasRectAreaItem', 'PanelContainer', 'HBoxContainer', 'VBoxContainer'
     ]
 
 import sys
@@ -26,11 +27,17 @@ import inspect
 import pygame as _pygame
 import pygame.locals as const
 from pygame.math import Vector2
-import datetime
+import time
+import os
 import os.path
 from graphics2d.scenetree import SceneTree, SceneItem, CanvasItem, CanvasRectAreaItem, CanvasContainer, PanelContainer, HBoxContainer, VBoxContainer
 from graphics2d.events import is_focus_event, is_pointer_event
 from graphics2d.scenetree.notification import Notification, listen
+from graphics2d.profiler import FrameProfiler
+from graphics2d.tracing import TraceWriter
+from graphics2d.imagecache import image_cache as _image_cache
+import graphics2d.drawing as _draw
+import graphics2d.glyphatlas as _glyphatlas
 
 class VarContainer:
     """
@@ -63,7 +70,12 @@ settings = {
     'MAX_FPS': 60,
     'FULLSCREEN': False,
     'RESIZABLE': False,
-    'DEFAULT_FONT_SIZE': 24
+    'DEFAULT_FONT_SIZE': 24,
+    'DIRTY_RECTS': False,
+    'HEADLESS': False,
+    'FIXED_UPDATE_HZ': None,
+    'MAX_CATCHUP_STEPS': 5,
+    'COALESCE_MOTION': False
 }
 
 scene_tree = None
@@ -79,8 +91,27 @@ mode_resolution=None
 _dirty_screen_rects = []
 _defered_calls = []
 
+# state of the fixed time step update scheduler
+_update_accumulator = 0.0
+_interpolation_alpha = 1.0
+_on_draw_wants_alpha = False
+
+_profiler = None
+
+# True while HEADLESS mode has replaced SDL_VIDEODRIVER, and the value from before (None if it wasn't set)
+_videodriver_overridden = False
+_previous_videodriver = None
+
 def _init():
-    global clock, scene_tree, mode_resolution
+    global clock, scene_tree, mode_resolution, _update_accumulator, _interpolation_alpha
+    global _videodriver_overridden, _previous_videodriver
+    if settings['HEADLESS']:
+        # SDL's dummy video driver gives us an in-memory screen surface without opening a window.
+        # shutdown() puts back the previous driver so later sessions in this process can open windows.
+        if not _videodriver_overridden:
+            _previous_videodriver = os.environ.get('SDL_VIDEODRIVER')
+            _videodriver_overridden = True
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
     _pygame.init()
     info = _pygame.display.Info()
     mode_resolution = Vector2(info.current_w, info.current_h)
@@ -90,8 +121,12 @@ def _init():
     _honor_display_mode_settings()
     if not _icon_already_set:
         _pygame.display.set_icon(icon)
+    _pygame.event.set_blocked(list(_ignored_events))
     clock = _pygame.time.Clock()
     scene_tree = SceneTree()
+    scene_tree.profiler = _profiler
+    _update_accumulator = 0.0
+    _interpolation_alpha = 1.0
 
 def _get_internal_asset_path():
     return os.path.join(os.path.dirname(__file__), "assets")
@@ -108,66 +143,200 @@ def _honor_display_mode_settings():
     global is_fullscreen, is_resizable, screen
     width = settings['WIDTH']
     height = settings['HEIGHT']
-    if settings['FULLSCREEN']:
+    if settings['FULLSCREEN'] and not settings['HEADLESS']:
         width = 0
         height = 0
-    screen = _pygame.display.set_mode((width, height), _get_display_flags())
+    screen = _pygame.display.set_mode((width, height), 0 if settings['HEADLESS'] else _get_display_flags())
     is_fullscreen = settings['FULLSCREEN']
     is_resizable = settings['RESIZABLE']
     request_redraw()
 
 
+# currently we ignore these events. They are blocked in SDL's event queue, so they never reach us.
+_ignored_events = frozenset((_pygame.WINDOWMOVED, _pygame.ACTIVEEVENT, _pygame.WINDOWCLOSE, _pygame.WINDOWENTER, _pygame.WINDOWLEAVE,
+                             _pygame.WINDOWRESIZED, _pygame.VIDEOEXPOSE, _pygame.WINDOWEXPOSED, _pygame.WINDOWSIZECHANGED))
+
+
+def _coalesce_motion(events):
+    """
+    Merges each run of consecutive MOUSEMOTION events into a single event with the last position and
+    the summed up rel, and each run of FINGERMOTION events into one event per finger with the summed
+    up dx and dy. Events of other types are left alone, so their order relative to the motion is kept.
+    """
+    result = []
+    i = 0
+    n = len(events)
+    while i < n:
+        event = events[i]
+        if event.type == _pygame.MOUSEMOTION:
+            j = i + 1
+            while j < n and events[j].type == _pygame.MOUSEMOTION:
+                j += 1
+            if j - i > 1:
+                attributes = dict(events[j-1].dict)
+                attributes['rel'] = (sum(e.rel[0] for e in events[i:j]), sum(e.rel[1] for e in events[i:j]))
+                event = _pygame.event.Event(_pygame.MOUSEMOTION, attributes)
+            result.append(event)
+            i = j
+        elif event.type == _pygame.FINGERMOTION:
+            fingers = {}
+            while i < n and events[i].type == _pygame.FINGERMOTION:
+                e = events[i]
+                key = (e.touch_id, e.finger_id)
+                if key in fingers:
+                    attributes = dict(e.dict)
+                    attributes['dx'] = fingers[key].dx + e.dx
+                    attributes['dy'] = fingers[key].dy + e.dy
+                    e = _pygame.event.Event(_pygame.FINGERMOTION, attributes)
+                fingers[key] = e
+                i += 1
+            result.extend(fingers.values())
+        else:
+            result.append(event)
+            i += 1
+    return result
+
+
 def _event_loop():
-    global needs_redraw
-    # currently we ignore these events
-    ignore = [_pygame.WINDOWMOVED, _pygame.ACTIVEEVENT, _pygame.WINDOWCLOSE, _pygame.WINDOWENTER, _pygame.WINDOWLEAVE,
-              _pygame.WINDOWRESIZED, _pygame.VIDEOEXPOSE, _pygame.WINDOWEXPOSED, _pygame.WINDOWSIZECHANGED]
     running = True
-    last = datetime.datetime.now()
+    last = time.perf_counter()
     while running:
-        for callable in _defered_calls:
-            callable()
-        _defered_calls.clear()
-
-        for event in _pygame.event.get():
-            if event.type in ignore:
-                continue
-            elif event.type == _pygame.QUIT:
-                running = False
-            elif event.type == _pygame.VIDEORESIZE:
-               _handle_window_resize(event)
-               """
-               elif scene_tree.has_active_modal():
-                   modal = scene_tree.get_active_modal_node()
-                   modal.on_input(event)
-                   if isinstance(modal, CanvasRectAreaItem) and not scene_tree.event_consumed:                    
-                       modal.on_gui_input(event)
-               """
-            else:
-                scene_tree.event_consumed = False
-                scene_tree.handle_input(event, scene_tree.root)
-                if not scene_tree.event_consumed:
-                    hooks['on_input'](event)
-
-        now = datetime.datetime.now()
-        dt = now-last
+        now = time.perf_counter()
+        msecs = (now - last) * 1000
         last = now
-        msecs = dt.seconds * 1000 + (dt.microseconds / 1000)
-        hooks['on_update'](msecs)
-        scene_tree.perform_updates(msecs)
-        drawn = False
-        if needs_redraw or settings['ALWAYS_REDRAW']:
-            drawn = True
+        running = _run_frame(msecs)
+        clock.tick(settings['MAX_FPS'])
+
+
+def _run_frame(msecs):
+    """
+    Runs a single iteration of the main loop. msecs is the time in milliseconds which
+    has passed since the last frame.
+
+    Returns False if the application was asked to quit, True otherwise.
+    """
+    global needs_redraw
+    profiler = _profiler
+    if profiler:
+        profiler.begin_frame()
+    running = True
+    for callable in _defered_calls:
+        callable()
+    _defered_calls.clear()
+    if profiler:
+        profiler.mark('deferred_calls')
+
+    events = _pygame.event.get()
+    if settings['COALESCE_MOTION']:
+        events = _coalesce_motion(events)
+    for event in events:
+        if event.type in _ignored_events:
+            continue
+        elif event.type == _pygame.QUIT:
+            running = False
+        elif event.type == _pygame.VIDEORESIZE:
+           _handle_window_resize(event)
+           """
+           elif scene_tree.has_active_modal():
+               modal = scene_tree.get_active_modal_node()
+               modal.on_input(event)
+               if isinstance(modal, CanvasRectAreaItem) and not scene_tree.event_consumed:                    
+                   modal.on_gui_input(event)
+           """
+        else:
+            scene_tree.event_consumed = False
+            scene_tree.handle_input(event, scene_tree.root)
+            if not scene_tree.event_consumed:
+                hooks['on_input'](event)
+    if profiler:
+        profiler.mark('events')
+
+    _perform_updates(msecs)
+    scene_tree.flush_layouts()
+    if profiler:
+        profiler.mark('layout')
+    drawn = False
+    full_redraw = needs_redraw or settings['ALWAYS_REDRAW']
+    partial = settings['DIRTY_RECTS'] and not full_redraw
+    if full_redraw:
+        drawn = True
+        if _on_draw_wants_alpha:
+            hooks['on_draw'](_interpolation_alpha)
+        else:
             hooks['on_draw']()
-        if scene_tree.has_redraw_requests() or settings['ALWAYS_REDRAW']:
-            drawn = True
-            size = Vector2(screen.get_size())
-            _handle_scenetree_drawing(scene_tree.root, size)
-        if drawn:
+        if profiler:
+            profiler.mark('on_draw')
+    if scene_tree.has_redraw_requests() or settings['ALWAYS_REDRAW']:
+        drawn = True
+        if partial:
+            # only the scene tree items will change on screen, so we only need to push
+            # their areas to the display
+            _collect_dirty_screen_rects()
+        size = Vector2(screen.get_size())
+        _handle_scenetree_drawing(scene_tree.root, size, full_redraw)
+        if profiler:
+            profiler.mark('scenetree_drawing')
+    if profiler and profiler.show_overlay:
+        overlay_rect = profiler.draw_overlay(screen)
+        if partial or not drawn:
+            partial = True
+            _dirty_screen_rects.append(overlay_rect)
+        drawn = True
+        profiler.mark('overlay')
+    if drawn:
+        if settings['HEADLESS']:
+            # there is no window to present anything in; the result stays in the screen surface
+            _dirty_screen_rects.clear()
+        elif partial:
+            if _dirty_screen_rects:
+                _pygame.display.update(_dirty_screen_rects)
+            _dirty_screen_rects.clear()
+        else:
             _pygame.display.flip()
-            needs_redraw = False
-            scene_tree.clear_redraw_requests()
-        clock.tick(settings['MAX_FPS'])
+        needs_redraw = False
+        scene_tree.clear_redraw_requests()
+        if profiler:
+            profiler.mark('present')
+    if profiler:
+        profiler.end_frame()
+    return running
+
+
+def _perform_updates(msecs):
+    """
+    Runs the on_update callbacks. If FIXED_UPDATE_HZ is set, the elapsed time is collected and
+    handed out in steps of constant length, at most MAX_CATCHUP_STEPS per frame.
+    """
+    global _update_accumulator, _interpolation_alpha
+    profiler = _profiler
+    hz = settings['FIXED_UPDATE_HZ']
+    if not hz:
+        hooks['on_update'](msecs)
+        if profiler:
+            profiler.mark('on_update')
+        scene_tree.perform_updates(msecs)
+        if profiler:
+            profiler.mark('perform_updates')
+        return
+
+    step = 1000 / hz
+    _update_accumulator += msecs
+    steps = 0
+    while _update_accumulator >= step:
+        if steps >= settings['MAX_CATCHUP_STEPS']:
+            # We can't keep up. Drop the time we are behind instead of trying to catch up
+            # in the next frames, which would only make them take even longer.
+            _update_accumulator %= step
+            break
+        hooks['on_update'](step)
+        if profiler:
+            profiler.mark('on_update')
+        scene_tree.perform_updates(step)
+        if profiler:
+            profiler.mark('perform_updates')
+        _update_accumulator -= step
+        steps += 1
+    _interpolation_alpha = _update_accumulator / step
 
 
 def _handle_window_resize(event):
@@ -188,26 +357,26 @@ def _handle_scenetree_resize(new_width, new_height):
         root.on_resized(new_width, new_height)
 
 
-def _handle_scenetree_drawing(node, size):
+def _handle_scenetree_drawing(node, size, full_redraw=True):
     # First handle drawing of the children, unless node is a CanvasContainer. These must handle
     # their children on their own. This means that the order in which we draw nodes in the tree
     # is depth first in post-order.
     if not isinstance(node, CanvasContainer):
         for child in node.children:
-            _handle_scenetree_drawing(child, size)
+            _handle_scenetree_drawing(child, size, full_redraw)
     
      
     if not isinstance(node, CanvasItem) or (not settings['ALWAYS_REDRAW'] and node not in scene_tree.redraw_requests):
         # Either an item with no visual representation or no redraw request for this item
         return
     elif isinstance(node, CanvasRectAreaItem):
-        p = node.get_viewport_position()  
+        p = node._get_viewport_position()
         if p[0] > size[0] or p[1] > size[1] or p[0] + node.size[0] < 0 or p[1] + node.size[1] < 0:
             # don't bother drawing as the item is outside the visible area
             return
         clip_size = (max(0, min(node.size[0], size.x-p.x)), max(0, min(node.size[1], size.y-p.y)))
     else:
-        p = node.get_viewport_position()  
+        p = node._get_viewport_position()
         clip_size = (max(0, size.x - p.x), max(0, size.y - p.y))
 
     r = _pygame.Rect(p, clip_size)
@@ -215,20 +384,53 @@ def _handle_scenetree_drawing(node, size):
     if r.w <= 0 or r.h <= 0:
         return
 
-    # This is ugly, but allows CanvasItems to draw without having their own surface AND makes
-    # the CanvasItem drawing API cleaner (no need to pass in a surface)    
-    subsurface = screen.subsurface(r)
-    node._draw_surface = subsurface
-    node.on_draw(subsurface)
-    node._draw_surface = None
+    if full_redraw and isinstance(node, CanvasContainer):
+        # the screen was painted over, so containers can't just repaint their dirty children
+        node._full_redraw = True
+    node._draw_on(screen.subsurface(r))
+
 
 
 
+def _collect_dirty_screen_rects():
+    """
+    Turns the redraw requests of the scene tree into a list of non-overlapping screen
+    rectangles which is stored in _dirty_screen_rects.
+    """
+    rects = []
+    for item in scene_tree.redraw_requests:
+        if item.get_tree() is None:
+            continue
+        r = calc_viewport_clip_rect(item)
+        if isinstance(item, CanvasContainer):
+            # containers which only repaint some of their children need just that area updated
+            region = item._get_dirty_region()
+            if region is not None:
+                p = item._get_viewport_position()
+                r = r.clip(region.move(p.x, p.y))
+        if r.w > 0 and r.h > 0:
+            rects.append(r)
+    _dirty_screen_rects[:] = _merge_rects(rects)
+
+
+def _merge_rects(rects):
+    """
+    Merges overlapping rectangles into their union until no two rectangles overlap.
+    """
+    merged = []
+    for r in rects:
+        i = r.collidelist(merged)
+        while i != -1:
+            r = r.union(merged.pop(i))
+            i = r.collidelist(merged)
+        merged.append(r)
+    return merged
+
 
 def calc_viewport_clip_rect(item):
     size = screen.get_size()
     parent = item.get_parent()
-    pos = item.get_viewport_position()
+    pos = item._get_viewport_position()
     if isinstance(parent, CanvasRectAreaItem):
         clipw = min(parent.size[0]-item.position.x, item.size[0])
         cliph = min(parent.size[1]-item.position.y, item.size[1])
@@ -289,6 +491,14 @@ def get_runtime_in_msecs():
     """
     return _pygame.time.get_ticks()
 
+def get_interpolation_alpha():
+    """
+    Returns how far (between 0.0 and 1.0) the current frame lies between the last and the next
+    fixed update step. Use it to interpolate positions when drawing if FIXED_UPDATE_HZ is set.
+    Without a fixed update rate, this is always 1.0.
+    """
+    return _interpolation_alpha
+
 def get_monitor_resolution() -> Vector2:
     return mode_resolution
 
@@ -297,17 +507,133 @@ def get_scenetree():
     return scene_tree
 
 
+def enable_profiler(history=120, per_node=True, overlay=False) -> FrameProfiler:
+    """
+    Starts recording frame timings for the last `history` frames. If per_node is True, the
+    on_update and on_draw callbacks of the scene tree items are timed individually. If overlay
+    is True, a frame time graph is drawn in the bottom left corner of the window.
+
+    Returns the FrameProfiler, which can be queried for the recorded timings.
+    """
+    global _profiler
+    _profiler = FrameProfiler(history, per_node)
+    _profiler.show_overlay = overlay
+    if scene_tree:
+        scene_tree.profiler = _profiler
+    return _profiler
+
+def disable_profiler():
+    """
+    Stops recording frame timings. This also stops a running trace.
+    """
+    global _profiler
+    stop_trace()
+    _profiler = None
+    if scene_tree:
+        scene_tree.profiler = None
+    request_redraw()
+
+def start_trace(filename, per_node=None):
+    """
+    Starts writing a frame timeline in the Chrome Trace Event format to filename. Each frame
+    phase becomes a span; if per_node is True, item callbacks are nested below the phases.
+    Enables the profiler if it isn't running already.
+
+    If per_node is given, it is applied to the profiler, even one that was already running.
+    Otherwise a running profiler keeps its setting and a new one times items individually.
+
+    Open the file in chrome://tracing or https://ui.perfetto.dev.
+    """
+    profiler = _profiler
+    if profiler is None:
+        profiler = enable_profiler(per_node=True if per_node is None else per_node)
+    elif per_node is not None:
+        profiler.per_node = per_node
+    stop_trace()
+    profiler.trace = TraceWriter(filename)
+
+def stop_trace():
+    """
+    Finishes the trace started with start_trace(), if any.
+    """
+    if _profiler and _profiler.trace:
+        _profiler.trace.close()
+        _profiler.trace = None
+
+def get_profiler() -> FrameProfiler:
+    """
+    Returns the active FrameProfiler, or None if profiling is disabled.
+    """
+    return _profiler
+
 def defer_to_next_frame(callable):
     """
     Takes a callable and executes it at the beginning of the next frame    
     """
     _defered_calls.append(callable)
 
+def run_frames(n, dt=None):
+    """
+    Runs n frames of the main loop as fast as possible. Only available after go() has been
+    called with HEADLESS set to True.
+
+    dt is the fixed time step in milliseconds which every frame pretends has passed. It
+    defaults to the frame time corresponding to MAX_FPS. Returns False if the application
+    was asked to quit (e.g. because a QUIT event was posted), True otherwise.
+    """
+    if not settings['HEADLESS'] or screen is None:
+        raise RuntimeError("run_frames() can only be used after go() was called with HEADLESS = True")
+    if dt is None:
+        dt = 1000 / (settings['MAX_FPS'] or 60)
+    for i in range(n):
+        if not _run_frame(dt):
+            return False
+    return True
+
+def shutdown():
+    """
+    Ends a headless session started with go(): runs the on_exit callback and shuts pygame down.
+    """
+    global screen, _videodriver_overridden
+    try:
+        hooks['on_exit']()
+    except Exception as e:
+        print("Exception occured while processing the main on_exit callback.", file=sys.stderr)
+        print(e, file=sys.stderr)
+    finally:
+        stop_trace()
+        # cached images are converted to the pixel format of the display which is about to go away
+        _image_cache.shutdown()
+        # font objects (and text rendered with them) can't be used once pygame.font has quit
+        _draw.font_cache.clear()
+        _draw.text_cache.clear()
+        _glyphatlas.clear_glyph_atlases()
+        # make sure we quit pygame. If we don't because an exception bypasses this,
+        # some systems may freeze until they notice we're dead.
+        _pygame.quit()
+        screen = None
+        if _videodriver_overridden:
+            if _previous_videodriver is None:
+                os.environ.pop('SDL_VIDEODRIVER', None)
+            else:
+                os.environ['SDL_VIDEODRIVER'] = _previous_videodriver
+            _videodriver_overridden = False
+
+def _count_positional_parameters(func):
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return 0
+    return len([p for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+
 def go():
     """
     Configures pygame and starts the event loop
+
+    If HEADLESS is True, no window is opened and go() returns right after on_ready() has run.
+    Frames are then driven with run_frames(), and the session is ended with shutdown().
     """
-    global _calling_module
+    global _calling_module, _on_draw_wants_alpha
     frm = inspect.stack()[1]
     mod = inspect.getmodule(frm[0])
     _calling_module = mod
@@ -315,29 +641,34 @@ def go():
     for name in hooks.keys():
         if name in g:
             hooks[name] = getattr(mod, name)
+        else:
+            hooks[name] = empty_func
 
     for name in settings.keys():
         if name in g:
             settings[name] = getattr(mod, name)
 
+    # on_draw(alpha) receives the interpolation alpha, a plain on_draw() doesn't
+    _on_draw_wants_alpha = _count_positional_parameters(hooks['on_draw']) > 0
+
     
     _init()
     _pygame.display.set_caption("Graphics 2D Window")
     _honor_display_mode_settings()
 
+    if settings['HEADLESS']:
+        try:
+            hooks['on_ready']()
+        except Exception:
+            shutdown()
+            raise
+        return
+
     try:
         hooks['on_ready']()
         _event_loop()        
     finally:        
-        # make sure main on_exit handler runs
-        try:
-            hooks['on_exit']()
-        except Exception as e:
-            print("Exception occured while processing the main on_exit callback.", file=sys.stderr)
-            print(e, file=sys.stderr)
-        
-        # make sure we quit pygame. If we don't because an exception bypasses this,
-        # some systems may freeze until they notice we're dead.
-        _pygame.quit()
+        # make sure main on_exit handler runs and pygame quits
+        shutdown()
 
 
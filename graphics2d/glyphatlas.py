@@ -0,0 +1,130 @@
+"""
+Glyph atlas text rendering for text that changes every frame (counters, timers, coordinates...).
+
+Caching whole rendered strings doesn't help with such text because every string is new. A GlyphAtlas
+instead rasterizes every character once per (font, color, antialias) into a shared surface and composes
+strings from these glyphs with a single Surface.blits call. Glyphs are placed next to each other without
+kerning, so the result can differ very slightly from font.render.
+"""
+
+from collections import OrderedDict
+import pygame
+from pygame import Rect, Surface, SRCALPHA
+import graphics2d.drawing as _draw
+
+
+class GlyphAtlas:
+
+    def __init__(self, font: pygame.font.Font, color, antialias=True, atlas_width=512):
+        self.font = font
+        self.color = color
+        self.antialias = antialias
+        self.height = font.get_height()
+        self.surface = Surface((atlas_width, self.height), SRCALPHA)
+        # character -> (area in the atlas surface, advance)
+        self.glyphs = {}
+        self._next_x = 0
+        self._next_y = 0
+        # all glyphs of a monospace font have the same advance, which saves us the lookups when measuring
+        self.monospace_advance = None
+        if font.size("i")[0] == font.size("W")[0] == font.size(" ")[0]:
+            self.monospace_advance = font.size("W")[0]
+
+    def _add_glyph(self, char):
+        rendered = self.font.render(char, self.antialias, self.color)
+        w = rendered.get_width()
+        atlas_width, atlas_height = self.surface.get_size()
+        if self._next_x + w > atlas_width:
+            self._next_x = 0
+            self._next_y += self.height
+        if self._next_y + self.height > atlas_height:
+            # grow the atlas by doubling its height
+            grown = Surface((max(atlas_width, w), atlas_height * 2), SRCALPHA)
+            grown.blit(self.surface, (0, 0))
+            self.surface = grown
+        area = Rect(self._next_x, self._next_y, w, rendered.get_height())
+        self.surface.blit(rendered, area)
+        self._next_x += w
+        glyph = (area, w)
+        self.glyphs[char] = glyph
+        return glyph
+
+    def get_text_size(self, text):
+        """
+        Returns the (width, height) text takes up when drawn with this atlas.
+        """
+        if self.monospace_advance is not None:
+            return (self.monospace_advance * len(text), self.height)
+        glyphs = self.glyphs
+        width = 0
+        for char in text:
+            glyph = glyphs.get(char) or self._add_glyph(char)
+            width += glyph[1]
+        return (width, self.height)
+
+    def draw(self, target: Surface, text, position, background=None):
+        """
+        Draws text onto the target surface with its top left corner at position.
+        """
+        glyphs = self.glyphs
+        atlas = self.surface
+        x, y = position
+        if background is not None:
+            target.fill(background, (x, y, self.get_text_size(text)[0], self.height))
+        blits = []
+        append = blits.append
+        for char in text:
+            glyph = glyphs.get(char) or self._add_glyph(char)
+            append((atlas, (x, y), glyph[0]))
+            x += glyph[1]
+        if self.surface is not atlas:
+            # the atlas grew while adding glyphs, and the old surface lacks the new ones
+            atlas = self.surface
+            blits = [(atlas, dest, area) for _, dest, area in blits]
+        target.blits(blits, doreturn=False)
+
+    def render(self, text, background=None) -> Surface:
+        """
+        Returns a new surface containing text, like font.render does.
+        """
+        w, h = self.get_text_size(text)
+        surface = Surface((w, h), SRCALPHA)
+        if background is not None:
+            surface.fill(background)
+        self.draw(surface, text, (0, 0))
+        return surface
+
+
+# (font, color, antialias) -> GlyphAtlas, least recently used first. The atlases keep their fonts
+# alive, so without a limit they would defeat the limit of the font cache.
+_atlases = OrderedDict()
+_max_atlases = 32
+
+def get_glyph_atlas(font, color, antialias=True) -> GlyphAtlas:
+    """
+    Returns the shared glyph atlas for the given font, color and antialias setting.
+    """
+    key = (font, _draw._color_key(color), antialias)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = GlyphAtlas(font, color, antialias)
+        _atlases[key] = atlas
+        _trim()
+    else:
+        _atlases.move_to_end(key)
+    return atlas
+
+def set_glyph_atlas_limit(max_atlases):
+    """
+    Sets how many glyph atlases are kept. The least recently used ones are dropped first.
+    """
+    global _max_atlases
+    _max_atlases = max_atlases
+    _trim()
+
+def clear_glyph_atlases():
+    _atlases.clear()
+
+def _trim():
+    while len(_atlases) > _max_atlases:
+        _atlases.popitem(last=False)
@@ -0,0 +1,184 @@
+"""
+Loads images once and shares them.
+
+Images are identified by their canonical path and the modification time of the file, so loading the
+same file twice returns the same surface unless the file changed in between. Images can also be
+decoded on a pool of background threads, which helps a lot when a program loads many images at
+startup: decoding a PNG mostly runs without holding the GIL. Converting the decoded image to the
+display's pixel format has to happen on the main thread and is done when the image is first used.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import os.path
+import pygame
+
+
+class ImageFuture:
+    """
+    An image that is being loaded in the background.
+
+    Until loading has finished, `surface` is the placeholder (which may be None).
+    """
+
+    def __init__(self, cache, key, future, placeholder=None):
+        self.placeholder = placeholder
+        self._cache = cache
+        self._key = key
+        self._future = future
+        self._surface = None
+
+    def done(self) -> bool:
+        return self._surface is not None or self._future.done()
+
+    @property
+    def surface(self):
+        if self._surface is None:
+            if not self._future.done():
+                return self.placeholder
+            self._finish()
+        return self._surface
+
+    def result(self) -> pygame.Surface:
+        """
+        Waits until the image is loaded and returns it. Raises the exception loading failed with, if any.
+        """
+        if self._surface is None:
+            self._finish()
+        return self._surface
+
+    def _finish(self):
+        try:
+            self._surface = self._cache._store(self._key, self._future.result())
+        finally:
+            self._cache._pending.pop(self._key, None)
+
+
+class ImageCache:
+    """
+    Shares loaded images, keyed by (canonical path, mtime).
+
+    If budget is given, the least recently loaded images are dropped from the cache once their
+    surfaces take up more than budget bytes together.
+    """
+
+    def __init__(self, budget=None, workers=4):
+        self.budget = budget
+        self.workers = workers
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # (path, mtime) -> surface, least recently used first
+        self._images = OrderedDict()
+        # (path, mtime) -> ImageFuture
+        self._pending = {}
+        self._executor = None
+
+    def load(self, filename) -> pygame.Surface:
+        key = _image_key(filename)
+        surface = self._lookup(key)
+        if surface is not None:
+            return surface
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending.result()
+        self.misses += 1
+        return self._store(key, pygame.image.load(key[0]))
+
+    def load_async(self, filename, placeholder=None) -> ImageFuture:
+        """
+        Starts loading the image on a background thread and returns an ImageFuture for it.
+        """
+        key = _image_key(filename)
+        surface = self._lookup(key)
+        if surface is not None:
+            future = ImageFuture(self, key, None, placeholder)
+            future._surface = surface
+            return future
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+        self.misses += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="graphics2d-images")
+        future = ImageFuture(self, key, self._executor.submit(pygame.image.load, key[0]), placeholder)
+        self._pending[key] = future
+        return future
+
+    def unload(self, filename):
+        """
+        Drops all cached versions of the image from the cache.
+        """
+        path = _canonical_path(filename)
+        for key in [key for key in self._images if key[0] == path]:
+            self.used -= _surface_bytes(self._images.pop(key))
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self._trim()
+
+    def clear(self):
+        self._images.clear()
+        self._pending.clear()
+        self.used = 0
+
+    def shutdown(self):
+        """
+        Clears the cache and stops the background threads.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self.clear()
+
+    def get_memory_usage(self) -> dict:
+        """
+        Returns a dict mapping the path of each cached image to the number of bytes its surface uses.
+        """
+        return {key[0]: _surface_bytes(surface) for key, surface in self._images.items()}
+
+    def get_stats(self) -> dict:
+        return {'entries': len(self._images), 'pending': len(self._pending), 'bytes': self.used,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _lookup(self, key):
+        surface = self._images.get(key)
+        if surface is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+        return surface
+
+    def _store(self, key, surface):
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        # drops older versions of a file that has changed since
+        self.unload(key[0])
+        self._images[key] = surface
+        self.used += _surface_bytes(surface)
+        self._trim()
+        return surface
+
+    def _trim(self):
+        if self.budget is None:
+            return
+        while self.used > self.budget and len(self._images) > 1:
+            key, surface = self._images.popitem(last=False)
+            self.used -= _surface_bytes(surface)
+            self.evictions += 1
+
+
+def _canonical_path(filename):
+    return os.path.normcase(os.path.realpath(filename))
+
+def _image_key(filename):
+    path = _canonical_path(filename)
+    # raises FileNotFoundError right away rather than on a background thread
+    return (path, os.stat(path).st_mtime_ns)
+
+def _surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+
+image_cache = ImageCache()
@@ -0,0 +1,155 @@
+"""
+Frame profiler for the graphics2d framework.
+
+The profiler records how long each phase of a frame takes (deferred calls, event dispatch, updates,
+drawing, presenting) and, optionally, how long the on_update and on_draw callbacks of individual
+scene tree items take. The last frames are kept in a ring buffer which can be queried from code or
+drawn as a frame time graph on top of the window. If a TraceWriter is attached as `trace`, every
+phase and item callback is additionally written out as a span of a Chrome trace.
+
+Use graphics2d.framework.enable_profiler() to switch it on.
+"""
+
+from collections import deque
+from time import perf_counter
+import pygame
+import graphics2d.drawing as _draw
+
+
+class FrameRecord:
+    """
+    Timings of a single frame. All times are in milliseconds.
+    """
+    __slots__ = ('start', 'total', 'phases', 'nodes')
+
+    def __init__(self, start):
+        self.start = start
+        self.total = 0.0
+        # phase name -> msecs
+        self.phases = {}
+        # (item name, callback name) -> msecs
+        self.nodes = {}
+
+
+class FrameProfiler:
+    """
+    Records per-phase and per-item timings for the last `history` frames.
+    """
+
+    def __init__(self, history=120, per_node=True):
+        self.frames = deque(maxlen=history)
+        self.per_node = per_node
+        self.show_overlay = False
+        # frames taking longer than this are drawn in red in the overlay
+        self.budget_ms = 1000 / 60
+        # graphics2d.tracing.TraceWriter which receives every frame, phase and item callback as a span
+        self.trace = None
+        self._frame_count = 0
+        self._current = None
+        self._last_mark = 0.0
+
+    def begin_frame(self):
+        now = perf_counter()
+        self._current = FrameRecord(now)
+        self._last_mark = now
+
+    def mark(self, phase):
+        """
+        Attributes the time since the last mark (or the start of the frame) to the given phase.
+        """
+        now = perf_counter()
+        phases = self._current.phases
+        phases[phase] = phases.get(phase, 0.0) + (now - self._last_mark) * 1000
+        if self.trace:
+            self.trace.add_span(phase, self._last_mark, now, "phase")
+        self._last_mark = now
+
+    def end_frame(self):
+        frame = self._current
+        end = perf_counter()
+        frame.total = (end - frame.start) * 1000
+        self.frames.append(frame)
+        self._frame_count += 1
+        if self.trace:
+            self.trace.add_span("frame", frame.start, end, "frame", {"frame": self._frame_count})
+        self._current = None
+
+    def record_node(self, item, callback, start, end):
+        """
+        Records that the callback (e.g. 'on_update') of a scene item ran from start to end, which
+        are perf_counter() values.
+        """
+        if self._current is None:
+            return
+        if self.trace:
+            self.trace.add_span(item.name + "." + callback, start, end, "item")
+        key = (item.name, callback)
+        nodes = self._current.nodes
+        nodes[key] = nodes.get(key, 0.0) + (end - start) * 1000
+
+    def clear(self):
+        self.frames.clear()
+
+    def get_last_frame(self):
+        """
+        Returns the FrameRecord of the last completed frame, or None.
+        """
+        return self.frames[-1] if self.frames else None
+
+    def get_frame_times(self):
+        """
+        Returns the total times of the recorded frames, oldest first.
+        """
+        return [frame.total for frame in self.frames]
+
+    def get_phase_averages(self):
+        """
+        Returns a dict mapping each phase to its average time over the recorded frames.
+        """
+        totals = {}
+        for frame in self.frames:
+            for phase, msecs in frame.phases.items():
+                totals[phase] = totals.get(phase, 0.0) + msecs
+        n = len(self.frames)
+        return {phase: msecs / n for phase, msecs in totals.items()}
+
+    def get_slowest_nodes(self, count=10):
+        """
+        Returns up to count (item name, callback name, average msecs, max msecs) tuples,
+        slowest first. Averages are taken over all recorded frames.
+        """
+        totals = {}
+        maxima = {}
+        for frame in self.frames:
+            for key, msecs in frame.nodes.items():
+                totals[key] = totals.get(key, 0.0) + msecs
+                maxima[key] = max(maxima.get(key, 0.0), msecs)
+        n = len(self.frames)
+        result = [(key[0], key[1], msecs / n, maxima[key]) for key, msecs in totals.items()]
+        result.sort(key=lambda entry: entry[2], reverse=True)
+        return result[:count]
+
+    def draw_overlay(self, surface, height=60):
+        """
+        Draws a frame time graph into the bottom left corner of surface and returns
+        the rectangle that was drawn over.
+        """
+        bar_width = 2
+        width = self.frames.maxlen * bar_width
+        rect = pygame.Rect(0, surface.get_height() - height, width, height)
+        rect = rect.clip(surface.get_rect())
+        surface.fill((20, 20, 20), rect)
+        # the graph covers two frame budgets, so the budget line sits in the middle
+        scale = height / (2 * self.budget_ms)
+        for i, frame in enumerate(self.frames):
+            h = min(height, int(frame.total * scale))
+            color = (200, 50, 50) if frame.total > self.budget_ms else (50, 200, 50)
+            surface.fill(color, (rect.x + i * bar_width, rect.bottom - h, bar_width, h))
+        budget_y = rect.bottom - int(self.budget_ms * scale)
+        _draw.draw_line(surface, (rect.x, budget_y), (rect.right - 1, budget_y), (220, 220, 220))
+        if self.frames:
+            font = _draw.get_font(None, 16)
+            average = sum(self.get_frame_times()) / len(self.frames)
+            text = _draw.draw_text(font, "{:.1f} ms".format(average), (220, 220, 220))
+            surface.blit(text, (rect.x + 3, rect.y + 3))
+        return rect
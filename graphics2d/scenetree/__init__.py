@@ -1,6 +1,6 @@
 from graphics2d.scenetree.tree import SceneTree
 from graphics2d.scenetree.sceneitem import SceneItem
 from graphics2d.scenetree.canvasitem import CanvasItem, CanvasRectAreaItem
-from graphics2d.scenetree.canvascontainer import CanvasContainer, PanelContainer, HBoxContainer, VBoxContainer
+from graphics2d.scenetree.canvascontainer import CanvasContainer, PanelContainer, HBoxContainer, VBoxContainer, VirtualListContainer
 
 
@@ -1,11 +1,15 @@
 from graphics2d.scenetree.sceneitem import SceneItem
 from graphics2d.scenetree.notification import Notification
 from graphics2d.scenetree.canvasitem import CanvasItem, CanvasRectAreaItem
-from graphics2d.events import is_pointer_event, get_event_location, is_focus_event
+from graphics2d.scenetree.spatialindex import GridIndex
+from graphics2d.events import classify_event, EVENT_MOUSE, EVENT_TOUCH, EVENT_FOCUS
 from pygame.math import Vector2
+import pygame
 import pygame.locals as const
 from pygame import Rect, Surface
 import graphics2d.constants as G2D
+from bisect import bisect_right
+from itertools import accumulate
 
 class CanvasContainer(CanvasRectAreaItem):
     """
@@ -28,15 +32,33 @@ class CanvasContainer(CanvasRectAreaItem):
         super().__init__(**kwargs)
         # stores the item that currently contains the mouse
         self.item_containing_mouse = None
+        # Optional grid of the children's bounding boxes for pointer hit tests. Pass spatial_index=True
+        # (or a grid cell size in pixels) for containers with many children.
+        self._spatial_index = None
+        self._spatial_index_outdated = True
+        if kwargs.get('spatial_index'):
+            cell_size = kwargs['spatial_index']
+            self._spatial_index = GridIndex(64 if cell_size is True else cell_size)
+        # Children which requested a redraw since we were last drawn. As long as nothing else
+        # changed (_full_redraw is False), only their areas are repainted.
+        self._dirty_children = {}
+        self._full_redraw = True
+        # True while a layout queued with queue_layout() hasn't been performed yet
+        self._layout_pending = False
+        # True while the scene tree has yet to check whether our minimum size really changed, and the
+        # minimum size from before the change
+        self._min_size_check_pending = False
+        self._min_size_before = None
 
 
     def on_ready(self):
-        self.layout()
-        self.request_redraw()
+        self.queue_layout()
 
     def on_resized(self, new_width, new_height):
         # This will set our size
         super().on_resized(new_width, new_height)
+        # our parent is laying us out right now, so we lay out our children right away
+        self._layout_pending = False
         self.layout()
         self.request_redraw()
         self.emit(CanvasContainer.resized, new_width, new_height)
@@ -46,9 +68,124 @@ class CanvasContainer(CanvasRectAreaItem):
         self.request_redraw()
 
     def on_child_entered(self, node):
-        self.layout()
+        # our minimum size depends on our children
+        self.invalidate_min_size()
+
+    # False for containers which size their children themselves, so that the children's minimum sizes
+    # don't matter to them
+    _min_size_depends_on_children = True
+
+    def invalidate_min_size(self):
+        # whatever changed our minimum size changes the layout of our children as well
+        self.queue_layout()
+        self._drop_min_size()
+
+    def child_min_size_changed(self, child):
+        if self._min_size_depends_on_children:
+            self.queue_layout()
+            self._drop_min_size()
+
+    def _drop_min_size(self):
+        """
+        Drops the cached minimum size of this container and the containers above it, without measuring
+        anything. Whether the minimum sizes really changed, and the parents need a new layout, is checked
+        once before the next layout (see SceneTree.flush_layouts()), so adding many children stays cheap.
+        """
+        tree = self.get_tree()
+        node = self
+        while True:
+            cached = node._min_size_cache
+            if tree is not None and not node._min_size_check_pending:
+                node._min_size_check_pending = True
+                node._min_size_before = cached
+                tree.queue_min_size_check(node)
+            node._min_size_cache = None
+            if cached is None:
+                # the caches above were dropped together with ours, or were never filled
+                return
+            node = node.get_parent()
+            if not isinstance(node, CanvasContainer) or not node._min_size_depends_on_children:
+                return
+
+    def _check_min_size(self):
+        """
+        Called by the scene tree after the minimum size was dropped. Tells the parent if it really changed.
+        """
+        self._min_size_check_pending = False
+        before = self._min_size_before
+        self._min_size_before = None
+        if before is None or self.get_min_size() != before:
+            self._notify_min_size_changed()
+
+    def queue_layout(self):
+        """
+        Schedules a layout of this container. The scene tree performs queued layouts once per frame
+        (before drawing), so a series of changes, like adding many children, leads to a single layout.
+        """
+        tree = self.get_tree()
+        if tree is None:
+            # we'll be laid out when we enter the tree
+            return
+        self._layout_pending = True
+        tree.queue_layout(self)
         self.request_redraw()
 
+    def add_child(self, child):
+        super().add_child(child)
+        self._spatial_index_outdated = True
+
+    def remove_child(self, child):
+        super().remove_child(child)
+        self.invalidate_min_size()
+        self._spatial_index_outdated = True
+        self._full_redraw = True
+        self._dirty_children.pop(child, None)
+        if self.item_containing_mouse is child:
+            self.item_containing_mouse = None
+
+    def child_geometry_changed(self, child):
+        self._spatial_index_outdated = True
+        # the child's old area must be repainted as well
+        self._full_redraw = True
+
+    def request_redraw(self):
+        self._full_redraw = True
+        super().request_redraw()
+
+    def _draw_on(self, surface):
+        # While only some children are dirty, the clip rect restricts all painting (including
+        # backgrounds drawn by subclasses) to their area. _draw_child passes it on to the children.
+        region = self._get_dirty_region()
+        if region is not None:
+            old_clip = surface.get_clip()
+            surface.set_clip(region.clip(old_clip))
+            super()._draw_on(surface)
+            surface.set_clip(old_clip)
+        else:
+            super()._draw_on(surface)
+        self._dirty_children.clear()
+        self._full_redraw = False
+
+    def _get_dirty_region(self):
+        """
+        Returns the union of the dirty children's areas in our own coordinates, or None if
+        the whole container needs to be redrawn.
+        """
+        if self._full_redraw or not self._dirty_children:
+            return None
+        region = None
+        for child in self._dirty_children:
+            if not isinstance(child, CanvasRectAreaItem):
+                # we can't know which area a child without a size covers
+                return None
+            r = child.get_bbox()
+            if isinstance(child, CanvasContainer):
+                child_region = child._get_dirty_region()
+                if child_region is not None:
+                    r = child_region.move(r.x, r.y)
+            region = r if region is None else region.union(r)
+        return region
+
     def on_draw(self, draw_surface):
         for child in self.children:
             self._draw_child(child, draw_surface, draw_surface.get_size())
@@ -70,13 +207,20 @@ class CanvasContainer(CanvasRectAreaItem):
         if clip_size[0] <= 0 or clip_size[1] <= 0:
             # do not draw children who's visible area is zero
             return        
-        # This is ugly, but allows CanvasItems to draw without having their own surface AND makes
-        # the CanvasItem drawing API cleaner (no need to pass in a surface)            
         r = Rect(child.position, clip_size)
+        clip = draw_surface.get_clip()
+        if not clip.colliderect(r):
+            # outside of the area that is being repainted
+            return
+        if isinstance(child, CanvasContainer):
+            # a child container may only repaint its own dirty children if that covers all
+            # of its area we are repainting
+            child_region = child._get_dirty_region() if child in self._dirty_children else None
+            if child_region is None or not child_region.move(r.x, r.y).contains(clip.clip(r)):
+                child._full_redraw = True
         subsurface = draw_surface.subsurface(r)
-        child._draw_surface = subsurface
-        child.on_draw(subsurface)
-        child._draw_surface = None
+        subsurface.set_clip(clip.move(-r.x, -r.y))
+        child._draw_on(subsurface)
 
 
     def layout(self):
@@ -106,7 +250,7 @@ class CanvasContainer(CanvasRectAreaItem):
         """
         return (0, 0)
 
-    def get_min_size(self):
+    def _measure_min_size(self):
         """
         Calculates the minimum size of the Container
         """
@@ -121,17 +265,12 @@ class CanvasContainer(CanvasRectAreaItem):
         according to type; mouse and touch events are sent only to CanvasRectAreaItem children
         that contain the pointer. 
         """        
-        if is_pointer_event(event):            
-            pos = get_event_location(event)            
+        category, pos = classify_event(event)
+        if category is EVENT_MOUSE or category is EVENT_TOUCH:
             if pos:
-                has_mouse = None
-                for child in self.children:
-                    viewport_pos = child.get_viewport_position()
-                    r = Rect(viewport_pos, child.get_bbox().size)
-                    if isinstance(child, CanvasRectAreaItem) and r.collidepoint(pos):
-                        has_mouse = child
-                        child.on_gui_input(event)
-                        break
+                has_mouse = self.get_child_at(pos)
+                if has_mouse:
+                    has_mouse.on_gui_input(event)
                 if self.item_containing_mouse != has_mouse:
                     if self.item_containing_mouse:
                         self.item_containing_mouse.on_mouse_leave()
@@ -143,7 +282,7 @@ class CanvasContainer(CanvasRectAreaItem):
                 # we get here for MOUSEWHEEL events. What do we do with them?
                 pass
         
-        elif is_focus_event(event):
+        elif category is EVENT_FOCUS:
             # keyboard events are sent to the focused CanvasItem by the framework. So this
             # code is usually not executed. 
             pass
@@ -151,11 +290,45 @@ class CanvasContainer(CanvasRectAreaItem):
         else:
             print(self.name, "received but won't handle", event)
 
+    def get_child_at(self, viewport_pos):
+        """
+        Returns the topmost (e.g. last drawn) CanvasRectAreaItem child containing the given
+        viewport position, or None.
+        """
+        origin = self._get_viewport_position()
+        x = viewport_pos[0] - origin.x
+        y = viewport_pos[1] - origin.y
+        if self._spatial_index is not None:
+            if self._spatial_index_outdated:
+                self._rebuild_spatial_index()
+            return self._spatial_index.find_topmost(x, y)
+        for child in reversed(self.children):
+            if isinstance(child, CanvasRectAreaItem):
+                p = child.position
+                if p.x <= x < p.x + child.size[0] and p.y <= y < p.y + child.size[1]:
+                    return child
+        return None
+
+    def _rebuild_spatial_index(self):
+        index = self._spatial_index
+        index.clear()
+        for i, child in enumerate(self.children):
+            if isinstance(child, CanvasRectAreaItem):
+                index.insert(i, child, child.get_bbox())
+        self._spatial_index_outdated = False
+
     def child_requests_redraw(self, child):        
         # We do not propagate child redraw requests up the tree, as we are responsible
-        # for handling their redrawing. We simply ask to be redrawn ourselves and will 
-        # then redraw (currently) all the children.
-        self.request_redraw()
+        # for handling their redrawing. We remember which of our children needs a redraw
+        # and ask to be redrawn ourselves, without marking our whole area as dirty.
+        while child is not None and child.get_parent() is not self:
+            # the request may come from a descendant of one of our children
+            child = child.get_parent()
+        if child is None:
+            self._full_redraw = True
+        else:
+            self._dirty_children[child] = True
+        CanvasItem.request_redraw(self)
 
 
 class FreeLayoutContainer(CanvasContainer):
@@ -174,6 +347,7 @@ class FreeLayoutContainer(CanvasContainer):
     
     def on_draw(self, surface):        
         if self.bgcolor:
+            # fill respects the clip rect, so this only repaints the dirty area
             surface.fill(self.bgcolor)
         super().on_draw(surface)
 
@@ -189,13 +363,31 @@ class BoxContainer(CanvasContainer):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.orientation = G2D.HORIZONTAL
-        self.separation = 0
+        self._orientation = G2D.HORIZONTAL
+        self._separation = 0
         if 'orientation' in kwargs:
             self.orientation = kwargs['orientation']
         if 'separation' in kwargs:
             self.separation = kwargs['separation']
 
+    @property
+    def orientation(self):
+        return self._orientation
+
+    @orientation.setter
+    def orientation(self, orientation):
+        self._orientation = orientation
+        self.invalidate_min_size()
+
+    @property
+    def separation(self):
+        return self._separation
+
+    @separation.setter
+    def separation(self, separation):
+        self._separation = separation
+        self.invalidate_min_size()
+
     def get_content_min_size(self):
         """
         Calculates the minimum size of the content
@@ -371,8 +563,8 @@ class PanelContainer(CanvasContainer):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # left, right, top, bottom
-        self.borders = (0, 0, 0, 0)
-        self.margins = (0, 0, 0, 0)
+        self._borders = (0, 0, 0, 0)
+        self._margins = (0, 0, 0, 0)
         self.bg_color = None
 
         if 'margins' in kwargs:
@@ -382,6 +574,24 @@ class PanelContainer(CanvasContainer):
         if 'bg_color' in kwargs:
             self.bg_color = kwargs['bg_color']
 
+    @property
+    def margins(self):
+        return self._margins
+
+    @margins.setter
+    def margins(self, margins):
+        self._margins = margins
+        self.invalidate_min_size()
+
+    @property
+    def borders(self):
+        return self._borders
+
+    @borders.setter
+    def borders(self, borders):
+        self._borders = borders
+        self.invalidate_min_size()
+
     def _interpret_size_parameter(self, seq):
         if type(seq) is list or type(seq) is tuple:
             if len(seq) == 4:
@@ -422,8 +632,7 @@ class PanelContainer(CanvasContainer):
         if child is None:
             return
 
-        child.position[0] = self.margins[0] + self.borders[0]
-        child.position[1] = self.margins[2] + self.borders[2]
+        child.position = Vector2(self.margins[0] + self.borders[0], self.margins[2] + self.borders[2])
 
         min_width = self.margins[0] + self.margins[1] + self.borders[0] + self.borders[1]
         min_height = self.margins[2] + self.margins[3] + self.borders[2] + self.borders[3]
@@ -458,3 +667,191 @@ class PanelContainer(CanvasContainer):
 
         
 
+
+
+class VirtualListContainer(CanvasContainer):
+    """
+    A vertically scrolling list which can hold a huge number of rows.
+
+    Only the rows intersecting the container's area exist as child items. They are created with the
+    create_row callback, which returns a CanvasRectAreaItem, and filled with the data of a row by the
+    bind_row(row, index) callback. Row items that scroll out of view are reused for the rows scrolling
+    into view.
+
+    row_height is either a number or a function returning the height of the row with a given index.
+    With variable heights, call row_heights_changed() when they change.
+    The list scrolls with the mouse wheel, or with scroll_to() and scroll_to_index().
+
+    Row items waiting to be reused stay children of the list, but receive no on_update and on_input
+    calls until they are shown again.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if 'create_row' not in kwargs or 'bind_row' not in kwargs:
+            raise ValueError("VirtualListContainer needs the create_row and bind_row callbacks")
+        self.create_row = kwargs['create_row']
+        self.bind_row = kwargs['bind_row']
+        self.row_height = kwargs.get('row_height', 20)
+        # pixels scrolled per mouse wheel step
+        self.scroll_step = kwargs.get('scroll_step', 60)
+        self.bgcolor = kwargs.get('bgcolor', None)
+        self.scroll_offset = 0
+        # index -> row item for the rows currently shown, and row items waiting to be reused
+        self._active_rows = {}
+        self._free_rows = []
+        # free row -> its (process update, process input) settings from before it was put aside
+        self._row_processing = {}
+        # top of every row and the total height at the end, for variable row heights
+        self._offsets = None
+        self.item_count = 0
+        self.set_item_count(kwargs.get('item_count', 0))
+
+    def set_item_count(self, count):
+        self.item_count = count
+        self.row_heights_changed()
+
+    def row_heights_changed(self):
+        """
+        Recalculates the row positions. Call this when a row_height function returns different heights.
+        """
+        if callable(self.row_height):
+            self._offsets = [0]
+            self._offsets.extend(accumulate(self.row_height(i) for i in range(self.item_count)))
+        else:
+            self._offsets = None
+        self.refresh()
+
+    def refresh(self):
+        """
+        Binds all visible rows again, e.g. after the data shown in the list has changed.
+        """
+        for row in self._active_rows.values():
+            self._release_row(row)
+        self._active_rows.clear()
+        self.queue_layout()
+
+    def _release_row(self, row):
+        self._row_processing[row] = (row._process_update, row._process_input)
+        row.set_process_update(False)
+        row.set_process_input(False)
+        self._free_rows.append(row)
+
+    def _reuse_row(self):
+        row = self._free_rows.pop()
+        process_update, process_input = self._row_processing.pop(row)
+        row.set_process_update(process_update)
+        row.set_process_input(process_input)
+        return row
+
+    def get_content_height(self):
+        if self._offsets is not None:
+            return self._offsets[-1]
+        return self.item_count * self.row_height
+
+    def get_row_top(self, index):
+        if self._offsets is not None:
+            return self._offsets[index]
+        return index * self.row_height
+
+    def get_row_height(self, index):
+        if self._offsets is not None:
+            return self._offsets[index + 1] - self._offsets[index]
+        return self.row_height
+
+    def get_index_at(self, y):
+        """
+        Returns the index of the row at the given height in the list's content, or None.
+        """
+        if y < 0 or y >= self.get_content_height():
+            return None
+        if self._offsets is not None:
+            return bisect_right(self._offsets, y) - 1
+        return int(y // self.row_height)
+
+    def scroll_to(self, offset):
+        """
+        Scrolls the list so that the given height in its content is at the top.
+        """
+        offset = max(0, min(offset, self.get_content_height() - self.size[1]))
+        if offset != self.scroll_offset:
+            self.scroll_offset = offset
+            self.layout()
+            self.request_redraw()
+
+    def scroll_to_index(self, index):
+        self.scroll_to(self.get_row_top(index))
+
+    # rows get their size from us, so rebinding a row to data of another size never changes our layout
+    _min_size_depends_on_children = False
+
+    def on_child_entered(self, node):
+        # we manage the rows ourselves; they don't influence our size
+        pass
+
+    def layout(self):
+        self.scroll_offset = max(0, min(self.scroll_offset, self.get_content_height() - self.size[1]))
+        first = self.get_index_at(self.scroll_offset)
+        if first is None or self.size[1] <= 0:
+            visible = range(0)
+        else:
+            last = self.get_index_at(min(self.scroll_offset + self.size[1], self.get_content_height()) - 1)
+            visible = range(first, last + 1)
+        for index in [index for index in self._active_rows if index not in visible]:
+            self._release_row(self._active_rows.pop(index))
+        width = self.size[0]
+        for index in visible:
+            row = self._active_rows.get(index)
+            if row is None:
+                if self._free_rows:
+                    row = self._reuse_row()
+                else:
+                    row = self.create_row()
+                    self.add_child(row)
+                self.bind_row(row, index)
+                self._active_rows[index] = row
+                row.request_redraw()
+            row.position = Vector2(0, self.get_row_top(index) - self.scroll_offset)
+            height = self.get_row_height(index)
+            if row.size[0] != width or row.size[1] != height:
+                row.on_resized(width, height)
+        self.request_redraw()
+
+    def get_child_at(self, viewport_pos):
+        origin = self._get_viewport_position()
+        x = viewport_pos[0] - origin.x
+        y = viewport_pos[1] - origin.y
+        # rows scrolled partly out of view still extend beyond our bounds
+        if not (0 <= x < self.size[0] and 0 <= y < self.size[1]):
+            return None
+        index = self.get_index_at(y + self.scroll_offset)
+        row = self._active_rows.get(index)
+        if row is not None and 0 <= x < row.size[0]:
+            return row
+        return None
+
+    def on_input(self, event):
+        if event.type == const.MOUSEWHEEL:
+            if Rect(self._get_viewport_position(), self.size).collidepoint(pygame.mouse.get_pos()):
+                self.scroll_to(self.scroll_offset - event.y * self.scroll_step)
+                self.consume_event()
+
+    def on_draw(self, draw_surface):
+        if self.bgcolor:
+            draw_surface.fill(self.bgcolor)
+        size = draw_surface.get_size()
+        for row in self._active_rows.values():
+            if row.position.y < 0:
+                self._draw_partial_row(row, draw_surface)
+            else:
+                self._draw_child(row, draw_surface, size)
+
+    def _draw_partial_row(self, row, draw_surface):
+        # the top row may be partly scrolled out, which a subsurface can't represent
+        w, h = int(row.size[0]), int(row.size[1])
+        if w <= 0 or h <= 0:
+            return
+        surface = Surface((w, h), 0, draw_surface)
+        surface.blit(draw_surface, (0, 0), Rect(0, row.position.y, w, h))
+        row._draw_on(surface)
+        draw_surface.blit(surface, (0, row.position.y))
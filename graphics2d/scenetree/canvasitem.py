@@ -1,22 +1,82 @@
+import weakref
 from graphics2d.scenetree.sceneitem import SceneItem
 from pygame.math import Vector2
-from pygame import Color, Rect
+from pygame import Color, Rect, Surface, SRCALPHA
 import pygame.draw as draw
+import graphics2d.drawing as _drawing
+from time import perf_counter
+from graphics2d.scenetree.rendercache import render_cache
 
 # Note on internal implementation of drawing: The framework will reach into each CanvasItem object and
 # set the *private* _draw_surface* member before calling on_draw, and set it to None afterwards. So you
 # can ONLY draw in on_draw.
+#
+# The position of a CanvasItem in the viewport is cached. The position is stored as an ItemPosition, a Vector2
+# which tells its item about every change, so both assigning to position and changing it in place
+# (`item.position.x += 10`) update the cache.
+#
+# Items created with cache_as_bitmap=True render themselves into a surface of their own, which is blitted
+# whenever they are drawn until request_redraw() is called or their size changes. This only has an effect
+# on items with a size (CanvasRectAreaItems), and the surfaces are subject to a global memory budget
+# (see rendercache.py).
+
+class ItemPosition(Vector2):
+    """
+    The Vector2 holding the position of a CanvasItem. Changing it in place, e.g. by setting x or y,
+    notifies the item. Vectors calculated from it (position + offset) are ItemPositions without
+    an item and behave like any other Vector2.
+    """
+
+    # weak reference to the CanvasItem this is the position of
+    _item = None
+
+    def _changed(self):
+        item = self._item() if self._item is not None else None
+        if item is not None and item._position is self:
+            item._position_changed()
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name != '_item':
+            self._changed()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+
+def _notifying(method):
+    def changing_method(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._changed()
+        return result
+    changing_method.__name__ = method.__name__
+    changing_method.__doc__ = method.__doc__
+    return changing_method
+
+# the Vector2 methods which change the vector in place
+for _name in ('__iadd__', '__isub__', '__imul__', '__itruediv__', '__ifloordiv__', 'update', 'from_polar',
+              'normalize_ip', 'scale_to_length', 'reflect_ip', 'rotate_ip', 'rotate_rad_ip', 'rotate_ip_rad',
+              'clamp_magnitude_ip', 'move_towards_ip'):
+    if hasattr(Vector2, _name):
+        setattr(ItemPosition, _name, _notifying(getattr(Vector2, _name)))
+
 
 class CanvasItem(SceneItem):
     """
     CanvasItem is an abstract base class for all items living in the scene tree that have a visual appearance.
     """
 
+    _caches_viewport_position = True
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         if 'name' in kwargs:
             self.name = kwargs['name']
+
+        # Cached position relative to the viewport, None if it needs to be recalculated
+        self._viewport_position = None
        
         if 'position' in kwargs:
             self.position = kwargs['position']
@@ -31,6 +91,11 @@ class CanvasItem(SceneItem):
         # This will be set by the framework from the outside when calling the on_draw callback!!!
         self._draw_surface = None
 
+        self.cache_as_bitmap = kwargs.get('cache_as_bitmap', False)
+        # the surface this item rendered itself into if cache_as_bitmap is set
+        self._render_cache = None
+        self._render_cache_valid = False
+
     def request_redraw(self):
         """
         Call this to notify the SceneTree that this CanvasItem needs to redraw itself.
@@ -38,6 +103,7 @@ class CanvasItem(SceneItem):
         If this item has a CanvasItem parent, the redraw request is forwarded to the parent.
         Otherwise, the tree is notified directly.
         """
+        self._render_cache_valid = False
         parent = self.get_parent()
         if isinstance(parent, CanvasItem):
             parent.child_requests_redraw(self)
@@ -62,24 +128,99 @@ class CanvasItem(SceneItem):
                 tree.request_redraw(child)
         
 
+    @property
+    def position(self):
+        """
+        The position of this item relative to its first CanvasItem ancestor
+        """
+        return self._position
+
+    @position.setter
+    def position(self, new_position):
+        if new_position is getattr(self, '_position', None):
+            # changed in place, e.g. by position += offset, which has notified us already
+            return
+        position = ItemPosition(new_position)
+        position._item = weakref.ref(self)
+        self._position = position
+        self._position_changed()
+
+    def _position_changed(self):
+        """
+        Called whenever the position changes.
+        """
+        self._invalidate_viewport_position()
+        self._notify_geometry_changed()
+
+    def _notify_geometry_changed(self):
+        parent = self.get_parent()
+        if isinstance(parent, CanvasItem):
+            parent.child_geometry_changed(self)
+
+    def child_geometry_changed(self, child):
+        """
+        Called when a child CanvasItem was moved or resized.
+        """
+        pass
+
+    def _notify_min_size_changed(self):
+        parent = self.get_parent()
+        if isinstance(parent, CanvasItem):
+            parent.child_min_size_changed(self)
+
+    def child_min_size_changed(self, child):
+        """
+        Called when the minimum size of a child CanvasRectAreaItem changed. Only containers, which
+        lay out their children, care about this.
+        """
+        pass
+
     def get_viewport_position(self):
         """
         Returns the position of this item relative to the top left corner of the viewport.
         """
-        return self._get_viewport_position(self)
+        return Vector2(self._get_viewport_position())
 
-    def _get_viewport_position(self, node):
-        parent = node.parent() if node.parent else None
-        if isinstance(node, CanvasItem):
-            pos = node.position
-        else:
-            pos = Vector2(0, 0)
-        if parent:
-            return pos + self._get_viewport_position(parent)
+    def _get_viewport_position(self):
+        """
+        Returns the cached viewport position. The result must not be modified.
+        """
+        if self._viewport_position is not None:
+            return self._viewport_position
+        # collect the ancestors whose cache is outdated, then calculate their positions top-down
+        outdated = []
+        node = self
+        base = None
+        while node is not None:
+            if node._caches_viewport_position:
+                if node._viewport_position is not None:
+                    base = node._viewport_position
+                    break
+                outdated.append(node)
+            node = node.parent() if node.parent else None
+        if base is None:
+            base = Vector2(0, 0)
+        for node in reversed(outdated):
+            base = base + node.position
+            node._viewport_position = base
+        return base
+
+    def _draw_on(self, surface):
+        """
+        Used by the framework and containers to run on_draw with the given (sub)surface.
+        """
+        # This is ugly, but allows CanvasItems to draw without having their own surface AND makes
+        # the CanvasItem drawing API cleaner (no need to pass in a surface)
+        self._draw_surface = surface
+        tree = self.get_tree()
+        profiler = tree.profiler if tree else None
+        if profiler and profiler.per_node:
+            start = perf_counter()
+            self.on_draw(surface)
+            profiler.record_node(self, 'on_draw', start, perf_counter())
         else:
-            return pos
-    
- 
+            self.on_draw(surface)
+        self._draw_surface = None
 
     def on_ready(self):
         pass
@@ -98,6 +239,15 @@ class CanvasItem(SceneItem):
         """
         pass
 
+    def is_processing_input(self):
+        """
+        Returns True if the scene tree sends events to this item's on_input, which is the
+        case if the class overrides on_input or it was assigned to the item.
+        """
+        if self._process_input is None:
+            return type(self).on_input is not CanvasItem.on_input or 'on_input' in self.__dict__
+        return self._process_input
+
     def on_unhandled_input(self, event):
         """
         Callback to handle events that haven't been marked as handled.
@@ -138,6 +288,34 @@ class CanvasItem(SceneItem):
     def draw_filled_circle(self, center, radius, color):
         draw.circle(self._draw_surface, color, center, radius)
 
+    def draw_points(self, points, colors):
+        _drawing.draw_points(self._draw_surface, points, colors)
+
+    def draw_segments(self, starts, ends, colors):
+        _drawing.draw_segments(self._draw_surface, starts, ends, colors)
+
+    def draw_filled_rects(self, rects, colors):
+        _drawing.draw_filled_rects(self._draw_surface, rects, colors)
+
+    def draw_filled_circles(self, centers, radii, colors):
+        _drawing.draw_filled_circles(self._draw_surface, centers, radii, colors)
+
+    def draw_surface(self, source_surface, position, source_area=None):
+        self._draw_surface.blit(source_surface, position, source_area)
+
+    def draw_surfaces(self, blit_sequence):
+        """
+        Draws a sequence of (source_surface, position) or (source_surface, position, source_area)
+        tuples in one go.
+        """
+        self._draw_surface.blits(blit_sequence, doreturn=False)
+
+    def draw_batch(self, batch):
+        """
+        Flushes a graphics2d.drawing.SpriteBatch onto this item.
+        """
+        batch.flush(self._draw_surface)
+
     def draw_text(self, font, text, color, antialias=True, background=None):
         return font.render(text, antialias, color, background)
 
@@ -152,6 +330,8 @@ class CanvasRectAreaItem(CanvasItem):
     containers.
     """
     def __init__(self, **kwargs):
+        # result of get_min_size(), None if it needs to be measured again
+        self._min_size_cache = None
         super().__init__(**kwargs)
         self.size = Vector2(0, 0)
         self.min_size = (0, 0)
@@ -181,10 +361,100 @@ class CanvasRectAreaItem(CanvasItem):
         if 'flags' in kwargs:
             self.flags = kwargs['flags']
 
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, new_size):
+        if not isinstance(new_size, Vector2):
+            new_size = Vector2(new_size)
+        old_size = getattr(self, '_size', None)
+        self._size = new_size
+        # Vectors may have been changed in place, so the same object always counts as a change
+        if old_size is new_size or old_size != new_size:
+            self._notify_geometry_changed()
+
+    # Changing any of the size constraints drops the cached minimum sizes and makes the containers
+    # above this item lay themselves out again.
+
+    @property
+    def min_size(self):
+        return self._min_size
+
+    @min_size.setter
+    def min_size(self, min_size):
+        self._min_size = min_size
+        self.invalidate_min_size()
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        self._max_size = max_size
+        self.invalidate_min_size()
+
+    @property
+    def flags(self):
+        return self._flags
+
+    @flags.setter
+    def flags(self, flags):
+        self._flags = flags
+        self.invalidate_min_size()
+
+    @property
+    def weight_ratio(self):
+        return self._weight_ratio
+
+    @weight_ratio.setter
+    def weight_ratio(self, weight_ratio):
+        self._weight_ratio = weight_ratio
+        self.invalidate_min_size()
+
+    def invalidate_min_size(self):
+        """
+        Drops the cached minimum size of this item and tells the parent about it, which lays itself out
+        again if it is a container. Call this when the result of get_content_min_size() changes.
+        """
+        self._min_size_cache = None
+        self._notify_min_size_changed()
+
+    def _draw_on(self, surface):
+        if not self.cache_as_bitmap:
+            super()._draw_on(surface)
+            return
+        size = (int(self.size[0]), int(self.size[1]))
+        if size[0] <= 0 or size[1] <= 0:
+            return
+        cache = self._render_cache
+        if cache is None or cache.get_size() != size:
+            cache = Surface(size, SRCALPHA)
+            self._render_cache = cache
+            render_cache.store(self, cache)
+            self._render_cache_valid = False
+        elif self._render_cache_valid:
+            render_cache.touch(self)
+        if not self._render_cache_valid:
+            cache.fill((0, 0, 0, 0))
+            super()._draw_on(cache)
+            self._render_cache_valid = True
+        surface.blit(cache, (0, 0))
+
     def get_weight_ratio(self):
         return self.weight_ratio
 
     def get_min_size(self):
+        """
+        Returns the minimum size of this item. The result is cached until invalidate_min_size() is called.
+        """
+        if self._min_size_cache is None:
+            self._min_size_cache = self._measure_min_size()
+        return self._min_size_cache
+
+    def _measure_min_size(self):
         c = self.get_content_min_size()
         w = c[0] if self.min_size[0] is None else self.min_size[0]
         h = c[1] if self.min_size[1] is None else self.min_size[1]
@@ -203,6 +473,7 @@ class CanvasRectAreaItem(CanvasItem):
     def on_resized(self, new_width, new_height):
         self.size[0] = new_width
         self.size[1] = new_height
+        self._notify_geometry_changed()
 
     def on_gui_input(self, event):
         """
@@ -1,17 +1,23 @@
 from graphics2d import *
 from graphics2d.scenetree.canvasitem import CanvasRectAreaItem
 import graphics2d.drawing as _draw
+import graphics2d.glyphatlas as _glyphatlas
 
 
 class Label(CanvasRectAreaItem):
     """ 
     Displays text
+
+    Pass text_renderer='atlas' for text that changes very often (e.g. counters). It is then composed
+    from cached glyphs instead of being rendered (and cached) as a whole.
     """
 
     def __init__(self, **kwargs):
         
         super().__init__(**kwargs)
 
+        self.text_renderer = kwargs.get('text_renderer', 'cache')
+
         if 'text' in kwargs:
             self.text = kwargs['text']
         else:
@@ -40,6 +46,28 @@ class Label(CanvasRectAreaItem):
         if "max_size" not in kwargs:
             self.max_size = (None, None)
 
+    @property
+    def font(self):
+        return self._font
+
+    @font.setter
+    def font(self, font):
+        measured = hasattr(self, '_font')
+        self._font = font
+        if measured:
+            # measures the text again
+            self.text = self.__text
+
+    @property
+    def text_renderer(self):
+        return self._text_renderer
+
+    @text_renderer.setter
+    def text_renderer(self, text_renderer):
+        self._text_renderer = text_renderer
+        if hasattr(self, '_font'):
+            self.text = self.__text
+
     @property 
     def text(self):
         return self.__text
@@ -47,19 +75,31 @@ class Label(CanvasRectAreaItem):
     @text.setter
     def text(self, new_text):
         self.__text = new_text        
-        self.size = self.get_content_min_size()        
+        size = self.get_content_min_size()
+        self.size = size
+        if size != getattr(self, '_text_size', None):
+            # only text of a different size affects the layout of our containers
+            self._text_size = size
+            self.invalidate_min_size()
         self.request_redraw()
     
     def get_content_min_size(self):
-        if hasattr(self, "font"):
+        if hasattr(self, "_font"):
+            if self.text_renderer == 'atlas':
+                return _glyphatlas.get_glyph_atlas(self.font, self.color).get_text_size(self.__text)
             s = _draw.get_text_size(self.font, self.__text)
             return (s[0], s[1])
+        return (0, 0)
 
     def on_draw(self, surface):        
+        if self.text_renderer == 'atlas':
+            atlas = _glyphatlas.get_glyph_atlas(self.font, self.color)
+            surface.fill(self.bgcolor)
+            atlas.draw(surface, self.__text, (0, (self.size[1]-atlas.height)/2.0))
+            return
         pos = Vector2(0, 0)        
-        rendered_text = _draw.draw_text(self.font, self.__text, self.color, antialias=True)
+        rendered_text = _draw.draw_text_cached(self.font, self.__text, self.color, antialias=True)
         h = rendered_text.get_height()        
         pos = Vector2(0, (self.size[1]-h)/2.0)
         surface.fill(self.bgcolor)
         surface.blit(rendered_text, pos)
-    
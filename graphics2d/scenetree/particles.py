@@ -0,0 +1,177 @@
+"""
+A particle system for large numbers of small moving points (sparks, smoke, rain, snow...).
+
+All particle data lives in NumPy arrays which are updated and drawn with a handful of vectorized
+operations per frame, independent of the number of particles. The arrays are allocated once for
+the maximum number of particles; dead particles are compacted away and their slots are reused by
+newly emitted ones.
+
+Unlike on_update, which gets milliseconds, all particle parameters use seconds: speeds are in pixels
+per second, gravity in pixels per second squared and lifetimes in seconds.
+
+This module needs numpy.
+"""
+
+import math
+import pygame
+from graphics2d.scenetree.canvasitem import CanvasRectAreaItem
+import graphics2d.drawing as _draw
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Emitter:
+    """
+    Emits particles at a given rate from a point (or a disc around it if radius is given) in
+    the particle system's coordinates.
+
+    lifetime, speed and angle are (min, max) ranges from which each particle gets a random value.
+    Angles are in degrees, 0 pointing right and 90 pointing down. colors is a list of colors from
+    which each particle picks one at random.
+    """
+
+    def __init__(self, position=(0, 0), rate=100, lifetime=(1, 2), speed=(50, 100), angle=(0, 360),
+                 colors=((255, 255, 255),), radius=0):
+        self.position = position
+        self.rate = rate
+        self.lifetime = lifetime
+        self.speed = speed
+        self.angle = angle
+        self.colors = colors
+        self.radius = radius
+        self.active = True
+        # fraction of a particle left over from the last frame
+        self._pending = 0.0
+
+    def _take_count(self, dt):
+        if not self.active:
+            return 0
+        self._pending += self.rate * dt
+        n = int(self._pending)
+        self._pending -= n
+        return n
+
+
+class ParticleSystem(CanvasRectAreaItem):
+    """
+    Moves and draws up to capacity particles, which are created by the system's emitters.
+
+    Particles are drawn as particle_size x particle_size squares of pixels, in the item's own
+    coordinates, onto a 24 or 32 bit surface. Pixels outside the item's area are not drawn. If bgcolor is given, the item's
+    area is filled with it before the particles are drawn.
+    """
+
+    def __init__(self, **kwargs):
+        if np is None:
+            raise ImportError("ParticleSystem needs numpy. Install it with 'pip install numpy'.")
+        super().__init__(**kwargs)
+        self.capacity = kwargs.get('capacity', 10000)
+        self.gravity = kwargs.get('gravity', (0, 0))
+        self.particle_size = kwargs.get('particle_size', 1)
+        self.bgcolor = kwargs.get('bgcolor', None)
+        self.emitters = list(kwargs.get('emitters', ()))
+        self.count = 0
+        self._rng = np.random.default_rng(kwargs.get('seed', None))
+        # one row per particle: x, y, velocity x, velocity y, age, lifetime. Keeping everything in a
+        # single array makes removing dead particles a single operation.
+        self._data = np.zeros((self.capacity, 6), dtype=np.float32)
+        self._positions = self._data[:, 0:2]
+        self._velocities = self._data[:, 2:4]
+        self._ages = self._data[:, 4]
+        self._lifetimes = self._data[:, 5]
+        # colors packed as 0xRRGGBB
+        self._colors = np.zeros(self.capacity, dtype=np.uint32)
+
+    def add_emitter(self, emitter: Emitter) -> Emitter:
+        self.emitters.append(emitter)
+        return emitter
+
+    def remove_emitter(self, emitter: Emitter):
+        self.emitters.remove(emitter)
+
+    def emit(self, emitter: Emitter, n):
+        """
+        Emits n particles with the emitter's settings right away, e.g. for an explosion. Particles that
+        don't fit into the system's capacity are dropped.
+        """
+        n = min(n, self.capacity - self.count)
+        if n <= 0:
+            return
+        rng = self._rng
+        s = slice(self.count, self.count + n)
+        angles = np.radians(rng.uniform(emitter.angle[0], emitter.angle[1], n))
+        speeds = rng.uniform(emitter.speed[0], emitter.speed[1], n)
+        self._velocities[s, 0] = np.cos(angles) * speeds
+        self._velocities[s, 1] = np.sin(angles) * speeds
+        self._positions[s] = emitter.position
+        if emitter.radius:
+            offset_angles = rng.uniform(0, 2 * math.pi, n)
+            distances = emitter.radius * np.sqrt(rng.uniform(0, 1, n))
+            self._positions[s, 0] += np.cos(offset_angles) * distances
+            self._positions[s, 1] += np.sin(offset_angles) * distances
+        self._ages[s] = 0
+        self._lifetimes[s] = rng.uniform(emitter.lifetime[0], emitter.lifetime[1], n)
+        palette = np.array([_pack_rgb(color) for color in emitter.colors], dtype=np.uint32)
+        self._colors[s] = palette[rng.integers(len(palette), size=n)]
+        self.count += n
+
+    def clear(self):
+        """
+        Removes all particles.
+        """
+        self.count = 0
+        self.request_redraw()
+
+    def on_update(self, delta_time):
+        dt = delta_time / 1000
+        had_particles = self.count > 0
+        c = self.count
+        if c:
+            self._ages[:c] += dt
+            alive = self._ages[:c] < self._lifetimes[:c]
+            n = int(np.count_nonzero(alive))
+            if n < c:
+                # move the surviving particles to the front, which frees the slots at the end
+                survivors = np.flatnonzero(alive)
+                self._data[:n] = self._data.take(survivors, axis=0)
+                self._colors[:n] = self._colors.take(survivors)
+                self.count = c = n
+            if c:
+                # updating single columns is much faster than updating (x, y) pairs
+                data = self._data[:c]
+                gx, gy = self.gravity
+                if gx:
+                    data[:, 2] += gx * dt
+                if gy:
+                    data[:, 3] += gy * dt
+                data[:, 0] += data[:, 2] * dt
+                data[:, 1] += data[:, 3] * dt
+        for emitter in self.emitters:
+            n = emitter._take_count(dt)
+            if n:
+                self.emit(emitter, n)
+        if had_particles or self.count:
+            self.request_redraw()
+
+    def on_draw(self, surface):
+        if self.bgcolor is not None:
+            surface.fill(self.bgcolor)
+        c = self.count
+        if not c:
+            return
+        size = self.particle_size
+        pixel_positions = np.floor(self._positions[:c]).astype(np.intp)
+        x = pixel_positions[:, 0]
+        y = pixel_positions[:, 1]
+        colors = self._colors[:c]
+        for dx in range(size):
+            for dy in range(size):
+                _draw.put_pixels(surface, x + dx, y + dy, colors)
+
+
+def _pack_rgb(color):
+    color = pygame.Color(color)
+    return (color.r << 16) | (color.g << 8) | color.b
@@ -0,0 +1,75 @@
+"""
+Bookkeeping for CanvasItems drawn with cache_as_bitmap=True.
+
+Each such item keeps the surface it last rendered itself into. This module tracks how much memory
+these surfaces use and, when the budget is exceeded, drops the surfaces of the items that were
+drawn least recently. Those items simply render themselves again the next time they are drawn.
+"""
+
+from collections import OrderedDict
+import weakref
+
+# 64 MB by default
+DEFAULT_BUDGET = 64 * 1024 * 1024
+
+
+class RenderCache:
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.used = 0
+        self.evictions = 0
+        # id(item) -> (weak reference to item, bytes), least recently used first
+        self._entries = OrderedDict()
+
+    def store(self, item, surface):
+        """
+        Records that item now caches surface and evicts other items' surfaces if the
+        budget is exceeded.
+        """
+        key = id(item)
+        self._forget(key)
+        nbytes = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        self._entries[key] = (weakref.ref(item, lambda ref, key=key: self._forget(key)), nbytes)
+        self.used += nbytes
+        while self.used > self.budget and len(self._entries) > 1:
+            self._evict_oldest()
+
+    def touch(self, item):
+        """
+        Marks item's surface as recently used.
+        """
+        key = id(item)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def discard(self, item):
+        self._forget(id(item))
+
+    def set_budget(self, budget):
+        self.budget = budget
+        while self.used > self.budget and self._entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        key, (ref, nbytes) = self._entries.popitem(last=False)
+        self.used -= nbytes
+        self.evictions += 1
+        item = ref()
+        if item is not None:
+            item._render_cache = None
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.used -= entry[1]
+
+
+render_cache = RenderCache()
+
+
+def set_render_cache_budget(nbytes):
+    """
+    Sets the maximum number of bytes all cached item surfaces may use together.
+    """
+    render_cache.set_budget(nbytes)
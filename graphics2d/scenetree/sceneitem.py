@@ -7,6 +7,9 @@ class SceneItem:
     """
     A SceneItem is any object that can live in the scene tree.
     """
+
+    # True for items which cache their position in the viewport (see CanvasItem)
+    _caches_viewport_position = False
     
     def __init__(self, **kwargs):
         self.children = []      # Will hold references to all the children
@@ -14,6 +17,8 @@ class SceneItem:
         self.tree = None        # Will hold a weak reference to the scene tree
         self._initialized = False # Flag to remember whether on_ready was already called. Managed by Tree.
         self.filtered_events = ()  # Will receive all events
+        self._process_update = None  # None: on_update is called if the class overrides it
+        self._process_input = None  # None: on_input is called if the class overrides it
 
         self.listeners = {}
 
@@ -74,6 +79,52 @@ class SceneItem:
 
 
 
+    def set_process_update(self, enabled):
+        """
+        Enables or disables the per-frame on_update calls for this item.
+
+        By default, only items which override on_update are updated, so you only need this
+        to pause an item or to opt in when on_update is assigned dynamically.
+        """
+        self._process_update = enabled
+        tree = self.get_tree()
+        if tree:
+            tree._update_registration(self)
+
+    def is_processing_update(self):
+        """
+        Returns True if the scene tree calls on_update on this item every frame
+        """
+        if self._process_update is None:
+            return type(self).on_update is not SceneItem.on_update or 'on_update' in self.__dict__
+        return self._process_update
+
+    def set_process_input(self, enabled):
+        """
+        Enables or disables sending events to this item's on_input. Like set_process_update(), you
+        only need this to pause an item or to opt in when on_input is assigned dynamically.
+        """
+        self._process_input = enabled
+        tree = self.get_tree()
+        if tree:
+            tree._input_registration(self)
+
+    def is_processing_input(self):
+        """
+        Returns True if the scene tree sends events to this item's on_input
+        """
+        return bool(self._process_input)
+
+    def set_filtered_events(self, event_types):
+        """
+        Limits the events this item's on_input receives to the given event types. An empty
+        sequence means that the item receives all events.
+        """
+        self.filtered_events = event_types
+        tree = self.get_tree()
+        if tree:
+            tree._input_registration(self)
+
     def add_child(self, child):
         """
         Adds a child to this node.
@@ -86,11 +137,27 @@ class SceneItem:
             raise ValueError("The item {} already has parent {} and can't be added as a child of {}".format(child.name, child.get_parent().name, self.name))
         self.children.append(child)
         child.parent = weakref.ref(self)
+        child._invalidate_viewport_position()
         tree = self.get_tree()
         if tree:
+            tree._invalidate_traversal_cache()
             tree.notify_enter(child)
+            self.on_child_entered(child)
 
 
+    def add_children(self, children):
+        """
+        Adds several children at once. Containers are laid out only once, after all children have been added.
+        """
+        tree = self.get_tree()
+        if tree is None:
+            for child in children:
+                self.add_child(child)
+            return
+        with tree.suspend_layout():
+            for child in children:
+                self.add_child(child)
+
     def remove_child(self, child):
         if child.get_parent() != self:
             raise ValueError("The item {} is not a child of {}".format(child.name, self.name))
@@ -100,6 +167,24 @@ class SceneItem:
         self.children.remove(child)
         child.tree = None
         child.parent = None
+        child._invalidate_viewport_position()
+        if tree:
+            tree._invalidate_traversal_cache()
+
+    def _invalidate_viewport_position(self):
+        """
+        Marks the cached viewport positions of this item and all its descendants as outdated.
+        Called when an item is moved or gets a new parent.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._caches_viewport_position:
+                if node._viewport_position is None:
+                    # if an item's cache is outdated, so are the caches of its descendants
+                    continue
+                node._viewport_position = None
+            stack.extend(node.children)
 
     def consume_event(self):
         """
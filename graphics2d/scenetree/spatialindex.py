@@ -0,0 +1,69 @@
+from pygame import Rect
+
+
+class GridIndex:
+    """
+    A uniform grid which maps points to the rectangles covering them.
+
+    Every rectangle is stored in all the grid cells it overlaps, so a point query only has to
+    look at the few rectangles in a single cell. Rectangles covering a lot of cells are kept in
+    a separate list which every query checks, so that a single huge item can't flood the grid.
+    """
+
+    # rectangles spanning more cells than this are not stored in the cells
+    MAX_CELLS_PER_ITEM = 64
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.oversized = []
+
+    def clear(self):
+        self.cells.clear()
+        self.oversized.clear()
+
+    def insert(self, order, item, rect: Rect):
+        """
+        Adds item covering rect. Items with a higher order are considered to lie on top
+        of items with a lower order. Items must be inserted in increasing order.
+        """
+        if rect.w <= 0 or rect.h <= 0:
+            return
+        cs = self.cell_size
+        x0 = rect.left // cs
+        x1 = (rect.right - 1) // cs
+        y0 = rect.top // cs
+        y1 = (rect.bottom - 1) // cs
+        entry = (order, item, rect)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > GridIndex.MAX_CELLS_PER_ITEM:
+            self.oversized.append(entry)
+            return
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                key = (cx, cy)
+                if key in cells:
+                    cells[key].append(entry)
+                else:
+                    cells[key] = [entry]
+
+    def find_topmost(self, x, y):
+        """
+        Returns the item with the highest order whose rectangle contains (x, y), or None.
+        """
+        cs = self.cell_size
+        best = None
+        best_order = -1
+        entries = self.cells.get((int(x // cs), int(y // cs)))
+        if entries:
+            # entries are sorted by order, so the first hit from the back is the topmost one
+            for order, item, rect in reversed(entries):
+                if rect.collidepoint(x, y):
+                    best = item
+                    best_order = order
+                    break
+        for order, item, rect in self.oversized:
+            if order > best_order and rect.collidepoint(x, y):
+                best = item
+                best_order = order
+        return best
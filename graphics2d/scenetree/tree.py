@@ -1,10 +1,15 @@
 import sys
 import weakref
 import traceback
+from time import perf_counter
+from contextlib import contextmanager
 from graphics2d.scenetree.sceneitem import SceneItem
 from graphics2d.scenetree.canvasitem import CanvasItem, CanvasRectAreaItem
 from graphics2d.scenetree.canvascontainer import CanvasContainer
-from graphics2d.events import is_focus_event, is_pointer_event
+from graphics2d.events import classify_event, is_focus_event, EVENT_MOUSE, EVENT_TOUCH, EVENT_FOCUS
+
+# stack marker used by container_roots()
+_EMIT_NEXT = object()
 
 class SceneTree:
     """
@@ -19,6 +24,25 @@ class SceneTree:
         self.focused = None
 
         self.event_consumed = False
+        # FrameProfiler which receives per-item timings, if profiling is enabled
+        self.profiler = None
+        # depth first postorder of the whole tree; rebuilt when items are added or removed
+        self._postorder_cache = None
+        # items that receive on_update calls, and the order in which they receive them
+        self._update_items = set()
+        self._update_order = None
+        # items whose on_input receives events, the order in which they receive them, and for each
+        # event type the items interested in it
+        self._input_items = set()
+        self._input_order = None
+        self._input_routes = {}
+        # the CanvasRectAreaItems and outermost containers which receive on_gui_input calls
+        self._gui_targets = None
+        # containers waiting for their deferred layout, and how many suspend_layout() blocks are active
+        self._layout_queue = set()
+        self._layout_suspended = 0
+        # containers whose minimum size was dropped and has to be compared with the one before
+        self._min_size_checks = set()
 
 
     def __del__(self):
@@ -28,6 +52,7 @@ class SceneTree:
         assert(root.get_tree() is None)
         self.root = root
         root.tree = weakref.ref(self)
+        self._invalidate_traversal_cache()
         self.notify_enter(root)
 
 
@@ -38,6 +63,7 @@ class SceneTree:
         if self.root:
             self.notify_exit(self.root)
         self.root = None
+        self._invalidate_traversal_cache()
         self.clear_redraw_requests()
 
     def make_modal(self, node):
@@ -95,7 +121,61 @@ class SceneTree:
         for node in self.depthfirst_postorder(start_node):
             if isinstance(node, CanvasItem):
                 self.redraw_requests[node] = True
+                if isinstance(node, CanvasContainer):
+                    node._full_redraw = True
+
+
+    def queue_layout(self, container):
+        """
+        Remembers that the container needs to be laid out. See CanvasContainer.queue_layout().
+        """
+        self._layout_queue.add(container)
+
+    def queue_min_size_check(self, container):
+        """
+        Remembers that the container's minimum size may have changed, see CanvasContainer._drop_min_size().
+        """
+        self._min_size_checks.add(container)
+
+    def flush_layouts(self):
+        """
+        Performs the queued layouts, outer containers first. Laying out a container resizes its
+        children, which lays out child containers as well, so each container is laid out only once.
+        The framework calls this every frame before drawing.
 
+        Before that, containers whose minimum size may have changed are measured, inner containers
+        first, and the parents of those whose minimum size really changed are queued for a layout too.
+        """
+        if self._layout_suspended:
+            return
+        while self._layout_queue or self._min_size_checks:
+            while self._min_size_checks:
+                checks = sorted(self._min_size_checks, key=_depth, reverse=True)
+                self._min_size_checks.clear()
+                for container in checks:
+                    if container.get_tree() is self:
+                        container._check_min_size()
+                    else:
+                        container._min_size_check_pending = False
+            queue = sorted(self._layout_queue, key=_depth)
+            self._layout_queue.clear()
+            for container in queue:
+                if container._layout_pending and container.get_tree() is self:
+                    container._layout_pending = False
+                    container.layout()
+
+    @contextmanager
+    def suspend_layout(self):
+        """
+        Context manager which holds back all layouts until the end of the with block and
+        performs them then.
+        """
+        self._layout_suspended += 1
+        try:
+            yield self
+        finally:
+            self._layout_suspended -= 1
+        self.flush_layouts()
 
     def notify_enter(self, item):
         """
@@ -110,6 +190,8 @@ class SceneTree:
            - calling on_ready() if this is the first time the item is added to the tree
         """
         item.tree = weakref.ref(self)
+        self._update_registration(item)
+        self._input_registration(item)
         item.on_enter()
         if isinstance(item, CanvasItem):
             self.request_redraw(item)
@@ -138,6 +220,12 @@ class SceneTree:
                 print(traceback.format_exc())
             finally:
                 node.tree = None
+                if node in self._update_items:
+                    self._update_items.discard(node)
+                    self._update_order = None
+                if node in self._input_items:
+                    self._input_items.discard(node)
+                    self._invalidate_input_routes()
 
 
     def depthfirst_preorder(self, item: SceneItem = None):
@@ -148,9 +236,11 @@ class SceneTree:
             if self.root is None:
                 return
             item = self.root
-        yield item
-        for child in item.children:
-            yield from self.depthfirst_preorder(child)
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
 
     def depthfirst_postorder(self, item: SceneItem = None):
         """
@@ -160,9 +250,10 @@ class SceneTree:
             if self.root == None:
                 return
             item = self.root
-        for child in reversed(item.children):
-            yield from self.depthfirst_postorder(child)
-        yield item
+        if item is self.root:
+            yield from self._get_postorder()
+        else:
+            yield from reversed(self._build_preorder(item))
 
     def canvasitem_roots(self, item: SceneItem = None):
         """
@@ -176,12 +267,14 @@ class SceneTree:
                 return
             item = self.root
 
-        if isinstance(item, CanvasItem):
-            yield item
-            return
-        else:
-            for child in reversed(item.children):
-                yield from self.canvasitem_roots(child)
+        # children are pushed in order, so they are popped (and yielded) in reverse
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, CanvasItem):
+                yield node
+            else:
+                stack.extend(node.children)
 
     def container_roots(self, item: SceneItem = None):
         """
@@ -193,30 +286,206 @@ class SceneTree:
                 return
             item = self.root
         
-        if isinstance(item, CanvasContainer):
-            yield item
-        else:
-            for child in reversed(item.children):
-                yield from self.container_roots(child)
-            if isinstance(item, CanvasItem):
-                yield item
-    
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            if node is _EMIT_NEXT:
+                # all descendants of the item below the marker have been handled
+                yield stack.pop()
+            elif isinstance(node, CanvasContainer):
+                yield node
+            else:
+                if isinstance(node, CanvasItem):
+                    stack.append(node)
+                    stack.append(_EMIT_NEXT)
+                stack.extend(node.children)
+
+    def _build_preorder(self, item):
+        """
+        Returns a list of item and its descendants in depth first preorder. The
+        reverse of this list is the order depthfirst_postorder() yields.
+        """
+        order = []
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(reversed(node.children))
+        return order
+
+    def _get_postorder(self):
+        """
+        Returns the cached depth first postorder of the whole tree.
+        """
+        if self._postorder_cache is None:
+            if self.root is None:
+                return []
+            order = self._build_preorder(self.root)
+            order.reverse()
+            self._postorder_cache = order
+        return self._postorder_cache
+
+    def _invalidate_traversal_cache(self):
+        """
+        Called when items are added to or removed from the tree.
+        """
+        self._postorder_cache = None
+        self._update_order = None
+        self._gui_targets = None
+        self._invalidate_input_routes()
+
+    def _update_registration(self, item):
+        """
+        Adds item to or removes it from the items receiving on_update calls.
+        """
+        if item.is_processing_update():
+            if item not in self._update_items:
+                self._update_items.add(item)
+                self._update_order = None
+        elif item in self._update_items:
+            self._update_items.discard(item)
+            self._update_order = None
+
+    def _get_update_order(self):
+        """
+        Returns the items receiving on_update calls, in depth first postorder.
+        """
+        if self._update_order is None:
+            items = self._update_items
+            self._update_order = [node for node in self._get_postorder() if node in items]
+        return self._update_order
+
     def perform_updates(self, dt):
         """
-        Call update() on all items in the scene tree
+        Call update() on all items in the scene tree which process updates
         """
-        for item in self.depthfirst_postorder():        
+        profiler = self.profiler
+        if profiler and profiler.per_node:
+            for item in self._get_update_order():
+                if item.tree is None:
+                    # removed from the tree earlier in this frame
+                    continue
+                start = perf_counter()
+                item.on_update(dt)
+                profiler.record_node(item, 'on_update', start, perf_counter())
+            return
+        for item in self._get_update_order():
+            if item.tree is None:
+                continue
             item.on_update(dt)
    
 
+    def _input_registration(self, item):
+        """
+        Adds item to or removes it from the items receiving on_input calls.
+        """
+        if item.is_processing_input():
+            self._input_items.add(item)
+        else:
+            self._input_items.discard(item)
+        # the item's filtered_events might have changed as well
+        self._invalidate_input_routes()
+
+    def _invalidate_input_routes(self):
+        self._input_order = None
+        self._input_routes.clear()
+
+    def _get_input_order(self):
+        """
+        Returns the items receiving on_input calls in the order handle_input_on_input() visits
+        them: children (in order) before their parent.
+        """
+        if self._input_order is None:
+            items = self._input_items
+            self._input_order = [node for node in _postorder(self.root) if node in items] if items else []
+        return self._input_order
+
+    def _get_input_route(self, event_type):
+        """
+        Returns the items whose on_input wants events of the given type.
+        """
+        route = self._input_routes.get(event_type)
+        if route is None:
+            route = [node for node in self._get_input_order()
+                     if not node.filtered_events or event_type in node.filtered_events]
+            self._input_routes[event_type] = route
+        return route
+
+    def _get_gui_targets(self):
+        """
+        Returns the CanvasRectAreaItems which receive pointer events directly from the tree, in the order
+        handle_input_on_gui_input() visits them. Containers hand pointer events on to their children
+        themselves, so the items inside a container aren't part of this list.
+        """
+        if self._gui_targets is None:
+            if self.root is None:
+                return []
+            self._gui_targets = [node for node in _postorder(self.root, CanvasContainer)
+                                 if isinstance(node, CanvasRectAreaItem)]
+        return self._gui_targets
+
     def handle_input(self, event, node):
-        # First phase - every node receives the event via on_input() 
-        # until a node consumes it.
-        self.handle_input_on_input(event, node)
+        """
+        Sends the event to the items of node's subtree.
+
+        For the whole tree, events are routed: on_input is only called on items which override it
+        and whose filtered_events accept the event, and pointer events only reach the on_gui_input
+        of items containing the pointer.
+        """
+        if node is not self.root:
+            self.handle_input_on_input(event, node)
+            self.handle_input_on_gui_input(event, node)
+            return
+        # First phase - every interested item receives the event via on_input()
+        # until an item consumes it.
+        self._route_input(event)
+        if self.event_consumed:
+            return
         # In the second phase, we send the event to on_gui_input()
-        self.handle_input_on_gui_input(event, node)
+        self._route_gui_input(event)
         # TODO: Implement the third phase to handle unhandled events
         # via on_unhandled_input()
+
+    def _route_input(self, event):
+        route = self._get_input_route(event.type)
+        if not route:
+            return
+        profiler = self.profiler
+        per_node = profiler and profiler.per_node
+        for node in route:
+            if node.tree is None:
+                # removed from the tree by an earlier handler
+                continue
+            if per_node:
+                start = perf_counter()
+                node.on_input(event)
+                profiler.record_node(node, 'on_input', start, perf_counter())
+            else:
+                node.on_input(event)
+            if self.event_consumed:
+                return
+
+    def _route_gui_input(self, event):
+        category, pos = classify_event(event)
+        if category is EVENT_FOCUS:
+            if isinstance(self.focused, CanvasRectAreaItem):
+                self.focused.on_gui_input(event)
+            return
+        if pos is None or (category is not EVENT_MOUSE and category is not EVENT_TOUCH):
+            return
+        x, y = pos
+        for node in self._get_gui_targets():
+            if node.tree is None:
+                continue
+            if isinstance(node, CanvasContainer):
+                # containers also need to see the pointer leave, so they always get the event
+                node.on_gui_input(event)
+            else:
+                p = node._get_viewport_position()
+                if p.x <= x < p.x + node.size[0] and p.y <= y < p.y + node.size[1]:
+                    node.on_gui_input(event)
+            if self.event_consumed:
+                return
             
 
     def handle_input_on_input(self, event, node):
@@ -229,7 +498,13 @@ class SceneTree:
 
         # send event to node's on_input callback
         if isinstance(node, CanvasItem): 
-            node.on_input(event)
+            profiler = self.profiler
+            if profiler and profiler.per_node:
+                start = perf_counter()
+                node.on_input(event)
+                profiler.record_node(node, 'on_input', start, perf_counter())
+            else:
+                node.on_input(event)
             if self.event_consumed:
                 return        
 
@@ -259,4 +534,25 @@ class SceneTree:
                 node.on_gui_input(event)
 
 
-
+def _postorder(item, leaf_type=None):
+    """
+    Returns a list of item and its descendants in depth first postorder, visiting children in
+    order. The descendants of items of leaf_type are left out.
+    """
+    order = []
+    stack = [item]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if leaf_type is None or not isinstance(node, leaf_type):
+            stack.extend(node.children)
+    order.reverse()
+    return order
+
+def _depth(item):
+    depth = 0
+    parent = item.get_parent()
+    while parent is not None:
+        depth += 1
+        parent = parent.get_parent()
+    return depth
@@ -10,6 +10,11 @@ import pygame as _pygame
 from pygame.math import Vector2
 import graphics2d.drawing as _draw
 import graphics2d.framework as _framework
+import graphics2d.glyphatlas as _glyphatlas
+import graphics2d.imagecache as _imagecache
+from graphics2d.textureatlas import TextureAtlas
+from graphics2d.drawing import SpriteBatch
+import os.path as _path
 
 
 _VALID_IMAGE_EXTENSIONS = ['.bmp', '.jpg', '.jpeg', '.gif', '.lbm', '.pbm', '.pgm', '.ppm', '.pcx', '.png', '.pnm', '.tga', '.tiff', '.webp', '.xpm']
@@ -60,18 +65,56 @@ def draw_filled_circle(center, radius, color: _pygame.Color):
     _draw.draw_filled_circle(_framework.screen, center, radius, color)
 
 
-def draw_text(fontname : str, fontsize : float, text : str, position, color: _pygame.Color, antialiased=True, background=None):
+def draw_points(points, colors):
+    """
+    Draws many single pixel points at once. points is a list or NumPy array of (x, y) positions,
+    colors a single color for all of them or one color per point. Needs numpy.
+    """
+    _draw.draw_points(_framework.screen, points, colors)
+
+def draw_segments(starts, ends, colors):
+    """
+    Draws many one pixel wide lines at once, from each start point to the end point with the same index.
+    Needs numpy.
+    """
+    _draw.draw_segments(_framework.screen, starts, ends, colors)
+
+def draw_filled_rects(rects, colors):
+    """
+    Draws many filled rectangles, given as (x, y, width, height), at once. Needs numpy.
+    """
+    _draw.draw_filled_rects(_framework.screen, rects, colors)
+
+def draw_filled_circles(centers, radii, colors):
+    """
+    Draws many filled circles at once. radii is either a single radius or one radius per circle. Needs numpy.
+    """
+    _draw.draw_filled_circles(_framework.screen, centers, radii, colors)
+
+def draw_text(fontname : str, fontsize : float, text : str, position, color: _pygame.Color, antialiased=True, background=None, text_renderer='cache'):
     """
     Draws text with a given font, size and color at a given position,
     which is a (x, y) tuple.
+
+    Use text_renderer='atlas' for text that changes every frame.
     """
     font = _draw.get_font(fontname, fontsize)
-    surface = _draw.draw_text(font, text, color, antialiased, background)
+    if text_renderer == 'atlas':
+        _glyphatlas.get_glyph_atlas(font, color, antialiased).draw(_framework.screen, text, position, background)
+        return
+    surface = _draw.draw_text_cached(font, text, color, antialiased, background)
     _framework.screen.blit(surface, position)
 
 def draw_surface(source_surface, destination_position, source_area=None):
     _framework.screen.blit(source_surface, destination_position, source_area)
 
+def draw_surfaces(blit_sequence):
+    """
+    Draws a list of (surface, position) or (surface, position, source_area) tuples. This is
+    much faster than calling draw_surface for each of them.
+    """
+    _framework.screen.blits(blit_sequence, doreturn=False)
+
 
 def get_text_size(fontname : str, fontsize : float, text : str) -> Vector2:
     font = _draw.get_font(fontname, fontsize)
@@ -95,23 +138,45 @@ def get_font(fontname, fontsize=16) -> _pygame.font.Font:
     """
     return _draw.get_font(fontname, fontsize)
 
+def preload_fonts(fonts):
+    """
+    Loads a list of (fontname, fontsize) pairs ahead of time, so the first frames using them don't stutter.
+    """
+    _draw.preload_fonts(fonts)
+
+def _check_image_filename(filename):
+    try:
+        ext = _path.splitext(filename)[1].lower()
+    except TypeError:
+        raise ValueError("You must provide a valid string as a filename for load_image.")
+    if not ext:
+        raise ValueError("The filename you provided has no extension. Please provide a filename with an extension.")
+    if ext not in _VALID_IMAGE_EXTENSIONS:
+        raise ValueError("The filename you provided doesn't look like an image I can load. (Valid image extensions are {})".format(", ".join(_VALID_IMAGE_EXTENSIONS)))
+
 def load_image(filename) -> _pygame.Surface:
     """
     Loads the image stored in the file with the given filename.
 
     Supports most image formats, such as jpg, png, webp, gif, bmp and so on. Simple svg files are supported as well.
+    Loading the same file again returns the same surface, so copy() it before you draw onto it.
     """
-    try:
-        if len(filename) < 4:
-            raise ValueError("The filename you provided has no extension. Please provide a filename with an extension.")
-        ext = filename[-4:].lower()
-        if ext not in _VALID_IMAGE_EXTENSIONS:
-            raise ValueError("The filename you provided doesn't look like an image I can load. (Valid image extensions are {})".format(", ".join(VALID_IMAGE_EXTENSIONS)))
-    except TypeError:
-        raise ValueError("You must provide a valid string as a filename for load_image.")
-    surface = _pygame.image.load(filename)
-    surface = surface.convert_alpha(_framework.screen)
-    return surface
+    _check_image_filename(filename)
+    return _imagecache.image_cache.load(filename)
+
+def load_image_async(filename, placeholder=None) -> _imagecache.ImageFuture:
+    """
+    Starts loading an image in the background. The returned object's surface attribute is the
+    placeholder until the image has been loaded, and the image afterwards.
+    """
+    _check_image_filename(filename)
+    return _imagecache.image_cache.load_async(filename, placeholder)
+
+def preload_images(filenames):
+    """
+    Starts loading all the given images in the background, so later calls to load_image return quickly.
+    """
+    return [load_image_async(filename) for filename in filenames]
 
 def save_screen(filename):
     _pygame.image.save(_framework.screen, filename)
@@ -0,0 +1,130 @@
+"""
+Texture atlases (sprite sheets): many named images stored in one large surface.
+
+Frames are handed out as subsurfaces of the atlas surface, so they share its pixels and cost no extra
+memory. An atlas can be cut from a sheet along a grid, described by a JSON file, or packed together
+from separate images.
+"""
+
+import json
+import os.path
+import pygame
+from pygame import Rect, Surface, SRCALPHA
+from graphics2d.imagecache import image_cache
+
+
+class TextureAtlas:
+    """
+    A surface together with named rectangles (frames) in it.
+    """
+
+    def __init__(self, surface: Surface, frames=None):
+        self.surface = surface
+        self.rects = {}
+        self.frames = {}
+        if frames:
+            for name, rect in frames.items():
+                self.add_frame(name, rect)
+
+    def add_frame(self, name, rect):
+        rect = Rect(rect)
+        self.rects[name] = rect
+        self.frames[name] = self.surface.subsurface(rect)
+
+    def get(self, name) -> Surface:
+        """
+        Returns the frame with the given name as a subsurface of the atlas.
+        """
+        return self.frames[name]
+
+    def get_rect(self, name) -> Rect:
+        return self.rects[name]
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+    def __contains__(self, name):
+        return name in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def names(self):
+        return self.frames.keys()
+
+    @classmethod
+    def from_grid(cls, image, frame_size, names=None, margin=0, spacing=0):
+        """
+        Cuts image (a surface or a filename) into frames of frame_size, separated by spacing pixels and
+        starting margin pixels from the top left corner.
+
+        names maps frame names to (column, row) grid positions. Without names, every complete cell of
+        the grid becomes a frame named by its (column, row) tuple.
+        """
+        surface = _load(image)
+        w, h = frame_size
+        if names is None:
+            columns = (surface.get_width() - margin + spacing) // (w + spacing)
+            rows = (surface.get_height() - margin + spacing) // (h + spacing)
+            names = {(x, y): (x, y) for y in range(rows) for x in range(columns)}
+        frames = {name: (margin + x * (w + spacing), margin + y * (h + spacing), w, h)
+                  for name, (x, y) in names.items()}
+        return cls(surface, frames)
+
+    @classmethod
+    def from_json(cls, filename, image=None):
+        """
+        Loads an atlas described by a JSON file. Both the hash and the array variant of the common
+        TexturePacker format are understood, as well as a plain {name: [x, y, w, h]} object.
+
+        If image isn't given, the JSON file has to name the image in meta.image, relative to itself.
+        """
+        with open(filename, encoding="utf-8") as f:
+            description = json.load(f)
+        if image is None:
+            image = os.path.join(os.path.dirname(filename), description['meta']['image'])
+        frames = description.get('frames', description)
+        if isinstance(frames, list):
+            frames = {frame['filename']: frame for frame in frames}
+        rects = {}
+        for name, frame in frames.items():
+            if name == 'meta':
+                continue
+            if isinstance(frame, dict):
+                frame = frame['frame']
+                frame = (frame['x'], frame['y'], frame['w'], frame['h'])
+            rects[name] = frame
+        return cls(_load(image), rects)
+
+    @classmethod
+    def pack(cls, images, max_width=1024, padding=1):
+        """
+        Packs a dict of name -> surface into a single new atlas. Images are placed in rows
+        (shelves), tallest first, and the atlas is made just high enough to hold them all.
+        """
+        order = sorted(images, key=lambda name: images[name].get_height(), reverse=True)
+        rects = {}
+        x = y = shelf_height = 0
+        width = 0
+        for name in order:
+            w, h = images[name].get_size()
+            if x > 0 and x + w > max_width:
+                x = 0
+                y += shelf_height + padding
+                shelf_height = 0
+            rects[name] = Rect(x, y, w, h)
+            x += w + padding
+            width = max(width, x - padding)
+            shelf_height = max(shelf_height, h)
+        surface = Surface((max(width, 1), max(y + shelf_height, 1)), SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        surface.blits([(images[name], rect) for name, rect in rects.items()], doreturn=False)
+        return cls(surface, rects)
+
+
+def _load(image):
+    if isinstance(image, Surface):
+        return image
+    return image_cache.load(image)
@@ -0,0 +1,72 @@
+"""
+Writes frame timelines in the Chrome Trace Event format, which can be loaded into
+chrome://tracing or https://ui.perfetto.dev.
+
+Events are buffered and written to the file in chunks, so a trace can run for a long
+session without the memory usage growing.
+"""
+
+import json
+import os
+from time import perf_counter
+
+
+class TraceWriter:
+    """
+    Streams complete ("X") trace events into a JSON array in the given file.
+    """
+
+    def __init__(self, filename, buffer_size=1000, process_name="graphics2d"):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._origin = perf_counter()
+        self._pid = os.getpid()
+        self._buffer = []
+        self._empty = True
+        self._file = open(filename, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self._buffer.append(json.dumps({"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+                                        "args": {"name": process_name}}))
+
+    def add_span(self, name, start, end, category, args=None):
+        """
+        Adds a span named name lasting from start to end, which are perf_counter() values.
+        Spans that lie within another span are shown nested below it.
+        """
+        event = {"name": name, "cat": category, "ph": "X", "pid": self._pid, "tid": 0,
+                 "ts": round((start - self._origin) * 1000000, 3),
+                 "dur": round((end - start) * 1000000, 3)}
+        if args:
+            event["args"] = args
+        self._buffer.append(json.dumps(event))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered events to the file.
+        """
+        if not self._buffer or self._file is None:
+            return
+        if not self._empty:
+            self._file.write(",\n")
+        self._file.write(",\n".join(self._buffer))
+        self._buffer.clear()
+        self._empty = False
+
+    def close(self):
+        """
+        Writes the remaining events and terminates the JSON array.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._file.write("\n]\n")
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
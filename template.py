@@ -17,9 +17,28 @@ HEIGHT = 500
 # ein Neuzeichnen mittels draw() nötig machen.
 #ALWAYS_REDRAW = False
 
+# Wenn DIRTY_RECTS True ist, werden nur die Bereiche des Fensters aktualisiert, in denen Objekte aus dem Scene Tree
+# neu gezeichnet wurden. Das spart Zeit, wenn sich nur wenig auf dem Bildschirm verändert. Default ist False.
+# DIRTY_RECTS wirkt nur, wenn auch ALWAYS_REDRAW = False gesetzt ist, sonst wird jedes Frame das ganze Fenster
+# aktualisiert.
+#DIRTY_RECTS = True
+
+# Wenn HEADLESS True ist, wird kein Fenster geöffnet. go() kehrt nach on_ready() sofort zurück, und die Frames
+# werden mit run_frames(anzahl, dt) ausgeführt (z.B. für automatische Tests). Default ist False.
+#HEADLESS = True
+
 # Legt die maximale Framerate fest. Default ist 60.
 #MAX_FPS = 120
 
+# Wenn FIXED_UPDATE_HZ gesetzt ist, wird on_update genau so oft pro Sekunde mit einem konstanten dt aufgerufen.
+# Hinkt das Programm hinterher, werden pro Frame höchstens MAX_CATCHUP_STEPS (Default 5) Updates nachgeholt. Eine
+# Funktion on_draw(alpha) erhält dann den Anteil (0.0 bis 1.0) des nächsten Updates, der bereits verstrichen ist.
+#FIXED_UPDATE_HZ = 60
+
+# Wenn COALESCE_MOTION True ist, werden aufeinanderfolgende Mausbewegungen (und Fingerbewegungen) innerhalb eines
+# Frames zu einem einzigen Event zusammengefasst, dessen rel die ganze Bewegung enthält. Default ist False.
+#COALESCE_MOTION = True
+
 # Legt fest, ob das Fenster im Fullscreen-Modus geöffnet wird. Default ist False.
 #FULLSCREEN = True
 
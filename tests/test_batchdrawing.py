@@ -0,0 +1,108 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d import drawing
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def same_pixels(a, b):
+    return pygame.image.tobytes(a, "RGB") == pygame.image.tobytes(b, "RGB")
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatchDrawing(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+
+    def test_points(self):
+        points = self.rng.uniform(-10, 110, (500, 2))
+        colors = self.rng.integers(0, 256, (500, 3))
+        for surface, expected in ((pygame.Surface((100, 100)), pygame.Surface((100, 100))),
+                                  (pygame.Surface((100, 100), depth=24), pygame.Surface((100, 100), depth=24))):
+            drawing.draw_points(surface, points, colors)
+            for (x, y), color in zip(points.tolist(), colors.tolist()):
+                if 0 <= x < 100 and 0 <= y < 100:
+                    expected.set_at((int(x), int(y)), color)
+            self.assertTrue(same_pixels(surface, expected))
+
+    def test_points_respect_clip(self):
+        surface = pygame.Surface((10, 10))
+        surface.set_clip((0, 0, 5, 5))
+        drawing.draw_points(surface, [(2, 2), (7, 7)], "red")
+        self.assertEqual(tuple(surface.get_at((2, 2))), (255, 0, 0, 255))
+        self.assertEqual(tuple(surface.get_at((7, 7))), (0, 0, 0, 255))
+
+    def test_segments(self):
+        surface = pygame.Surface((50, 50))
+        drawing.draw_segments(surface, [(0, 0), (10, 40), (5, 5)], [(49, 0), (10, 10), (5, 5)], [(255, 0, 0), (0, 255, 0), (0, 0, 255)])
+        for x in range(50):
+            self.assertEqual(tuple(surface.get_at((x, 0)))[:3], (255, 0, 0))
+        for y in range(10, 41):
+            self.assertEqual(tuple(surface.get_at((10, y)))[:3], (0, 255, 0))
+        self.assertEqual(tuple(surface.get_at((5, 5)))[:3], (0, 0, 255))
+        # diagonal lines end exactly at their end points
+        drawing.draw_segments(surface, [(0, 49)], [(30, 20)], "white")
+        self.assertEqual(tuple(surface.get_at((30, 20)))[:3], (255, 255, 255))
+
+    def test_short_and_long_segments_match_draw_line(self):
+        starts = self.rng.integers(0, 100, (200, 2))
+        ends = starts + self.rng.integers(-40, 41, (200, 2))
+        surface = pygame.Surface((100, 100))
+        drawing.draw_segments(surface, starts, ends, "white")
+        lengths = np.abs(ends - starts).max(axis=1)
+        # long segments are drawn by draw.line, short ones cover the same pixel count
+        expected = pygame.Surface((100, 100))
+        for start, end in zip(starts[lengths >= 16].tolist(), ends[lengths >= 16].tolist()):
+            pygame.draw.line(expected, "white", start, end)
+        mask = pygame.mask.from_threshold(surface, (255, 255, 255), (1, 1, 1, 255))
+        expected_mask = pygame.mask.from_threshold(expected, (255, 255, 255), (1, 1, 1, 255))
+        self.assertEqual(mask.overlap_area(expected_mask, (0, 0)), expected_mask.count())
+        for (x0, y0), (x1, y1) in zip(starts[lengths < 16].tolist(), ends[lengths < 16].tolist()):
+            for x, y in ((x0, y0), (x1, y1)):
+                if 0 <= x < 100 and 0 <= y < 100:
+                    self.assertEqual(tuple(surface.get_at((x, y)))[:3], (255, 255, 255))
+
+    def test_filled_circles(self):
+        centers = self.rng.integers(0, 100, (50, 2))
+        radii = self.rng.integers(1, 10, 50)
+        surface = pygame.Surface((100, 100))
+        expected = pygame.Surface((100, 100))
+        drawing.draw_filled_circles(surface, centers, radii, (200, 100, 0))
+        for center, radius in zip(centers.tolist(), radii.tolist()):
+            pygame.draw.circle(expected, (200, 100, 0), center, radius)
+        self.assertTrue(same_pixels(surface, expected))
+
+    def test_circles_without_radius_are_skipped(self):
+        surface = pygame.Surface((20, 20))
+        drawing.draw_filled_circles(surface, [(10, 10), (5, 5)], [-3, 0], "red")
+        self.assertEqual(pygame.mask.from_threshold(surface, (0, 0, 0), (1, 1, 1, 255)).count(), 400)
+
+    def test_color_formats(self):
+        red = 0xff0000
+        self.assertEqual(drawing._pack_colors("red", 2), red)
+        self.assertEqual(drawing._pack_colors((255, 0, 0), 2), red)
+        self.assertEqual(drawing._pack_colors(np.array([255, 0, 0]), 2), red)
+        self.assertEqual(drawing._pack_colors(tuple(np.array([255, 0, 0, 255])), 2), red)
+        self.assertEqual(drawing._pack_colors(red, 2), red)
+        self.assertEqual(drawing._pack_colors([red, 0xff00, 0xff], 3).tolist(), [red, 0xff00, 0xff])
+        self.assertEqual(drawing._pack_colors(["red", (0, 255, 0)], 2).tolist(), [red, 0xff00])
+        self.assertEqual(drawing._pack_colors([(255, 0, 0), (0, 255, 0, 128)], 2).tolist(), [red, 0xff00])
+        self.assertEqual(drawing._pack_colors(np.array([[255, 0, 0], [0, 0, 255]]), 2).tolist(), [red, 0xff])
+
+    def test_filled_rects(self):
+        surface = pygame.Surface((20, 20))
+        drawing.draw_filled_rects(surface, [(0, 0, 5, 5), (10, 10, 5, 5)], ["red", "blue"])
+        self.assertEqual(tuple(surface.get_at((4, 4)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(surface.get_at((12, 12)))[:3], (0, 0, 255))
+        self.assertEqual(tuple(surface.get_at((7, 7)))[:3], (0, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
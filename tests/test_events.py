@@ -0,0 +1,105 @@
+import unittest
+import pygame
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import graphics2d.framework as framework
+from graphics2d import *
+from graphics2d.events import (classify_event, is_pointer_event, is_touch_event, is_focus_event, get_event_location,
+                               EVENT_MOUSE, EVENT_TOUCH, EVENT_FOCUS, EVENT_OTHER)
+
+
+def motion(pos, rel, buttons=(0, 0, 0)):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=rel, buttons=buttons)
+
+def finger(finger_id, x, y, dx, dy):
+    return pygame.event.Event(pygame.FINGERMOTION, touch_id=1, finger_id=finger_id, x=x, y=y, dx=dx, dy=dy)
+
+
+class TestCoalesceMotion(unittest.TestCase):
+
+    def test_mouse_motion_is_merged(self):
+        events = framework._coalesce_motion([motion((1, 1), (1, 1)), motion((3, 2), (2, 1)), motion((6, 2), (3, 0), (1, 0, 0))])
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].pos, (6, 2))
+        self.assertEqual(events[0].rel, (6, 2))
+        self.assertEqual(events[0].buttons, (1, 0, 0))
+
+    def test_other_events_split_runs(self):
+        click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(3, 2), button=1)
+        events = framework._coalesce_motion([motion((1, 1), (1, 1)), motion((3, 2), (2, 1)), click,
+                                             motion((4, 2), (1, 0)), motion((5, 2), (1, 0))])
+        self.assertEqual([e.type for e in events], [pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION])
+        self.assertEqual(events[0].rel, (3, 2))
+        self.assertEqual(events[2].rel, (2, 0))
+
+    def test_finger_motion_is_merged_per_finger(self):
+        events = framework._coalesce_motion([finger(0, 0.1, 0.1, 0.1, 0.0), finger(1, 0.5, 0.5, 0.0, 0.1),
+                                             finger(0, 0.2, 0.1, 0.1, 0.0)])
+        self.assertEqual(len(events), 2)
+        first = [e for e in events if e.finger_id == 0][0]
+        self.assertEqual(first.x, 0.2)
+        self.assertAlmostEqual(first.dx, 0.2)
+
+
+class TestClassifyEvent(unittest.TestCase):
+
+    def test_mouse_event(self):
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(3, 4), button=1)
+        self.assertEqual(classify_event(event), (EVENT_MOUSE, (3, 4)))
+        self.assertTrue(is_pointer_event(event))
+        self.assertFalse(is_touch_event(event))
+
+    def test_touch_event(self):
+        event = finger(0, 0.5, 0.25, 0, 0)
+        self.assertTrue(is_touch_event(event))
+        self.assertTrue(is_pointer_event(event))
+        self.assertEqual(classify_event(event)[0], EVENT_TOUCH)
+        self.assertIsNotNone(get_event_location(event))
+
+    def test_focus_and_other_events(self):
+        event = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a)
+        self.assertEqual(classify_event(event), (EVENT_FOCUS, None))
+        self.assertTrue(is_focus_event(event))
+        wheel = pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=1)
+        self.assertEqual(classify_event(wheel), (EVENT_OTHER, None))
+        self.assertFalse(is_pointer_event(wheel))
+
+
+class TestEventQueue(unittest.TestCase):
+
+    def setUp(self):
+        framework.settings['HEADLESS'] = True
+        go()
+
+    def tearDown(self):
+        shutdown()
+        framework.settings['HEADLESS'] = False
+        framework.settings['COALESCE_MOTION'] = False
+
+    def test_ignored_events_are_blocked(self):
+        for event_type in framework._ignored_events:
+            self.assertTrue(pygame.event.get_blocked(event_type))
+        self.assertFalse(pygame.event.get_blocked(pygame.MOUSEMOTION))
+
+    def test_coalesced_motion_reaches_handler_once(self):
+        received = []
+        framework.settings['COALESCE_MOTION'] = True
+        framework.hooks['on_input'] = lambda event: received.append(event) if event.type == pygame.MOUSEMOTION else None
+        try:
+            pygame.event.clear()
+            for i in range(5):
+                pygame.event.post(motion((i, 0), (1, 0)))
+            run_frames(1, 16)
+        finally:
+            framework.hooks['on_input'] = framework.empty_func
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0].rel, (5, 0))
+
+    def test_touch_location_is_in_pixels(self):
+        width, height = get_window_size()
+        self.assertEqual(get_event_location(finger(0, 0.5, 0.25, 0, 0)), (0.5 * width, 0.25 * height))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+import graphics2d.framework as framework
+from graphics2d import drawing
+from graphics2d.drawing import FontCache
+
+
+class TestFontCache(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+
+    def test_keys(self):
+        cache = FontCache()
+        font = cache.get(None, 16)
+        # float sizes are rounded and the default font name means the same as None
+        self.assertIs(cache.get(None, 16.2), font)
+        self.assertIs(cache.get(pygame.font.get_default_font(), 16), font)
+        self.assertIsNot(cache.get(None, 17), font)
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+
+    def test_limit_evicts_least_recently_used(self):
+        cache = FontCache(max_fonts=2)
+        small = cache.get(None, 10)
+        cache.get(None, 20)
+        cache.get(None, 10)
+        cache.get(None, 30)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        self.assertIs(cache.get(None, 10), small)
+        self.assertEqual(cache.get_stats()['entries'], 2)
+
+    def test_preload(self):
+        cache = FontCache()
+        cache.preload([(None, 12), (None, 24)])
+        cache.get(None, 12)
+        cache.get(None, 24)
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 0)
+
+    def test_shutdown_drops_fonts(self):
+        framework.settings['HEADLESS'] = True
+        try:
+            framework.go()
+            drawing.get_font(None, 16)
+            framework.shutdown()
+        finally:
+            framework.settings['HEADLESS'] = False
+        # the fonts died with pygame.font and must not be handed out in the next session
+        self.assertEqual(drawing.get_font_cache_stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
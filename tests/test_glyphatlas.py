@@ -0,0 +1,62 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d import glyphatlas
+from graphics2d.glyphatlas import GlyphAtlas, get_glyph_atlas
+
+
+class TestGlyphAtlas(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+        self.font = pygame.font.Font(None, 20)
+
+    def test_glyphs_are_rendered_once(self):
+        atlas = GlyphAtlas(self.font, (255, 255, 255))
+        atlas.render("1001")
+        self.assertEqual(set(atlas.glyphs), {"0", "1"})
+        area = atlas.glyphs["0"][0]
+        atlas.render("0110")
+        self.assertIs(atlas.glyphs["0"][0], area)
+
+    def test_text_size_matches_rendered_surface(self):
+        atlas = GlyphAtlas(self.font, (255, 255, 255))
+        surface = atlas.render("Frame 1234")
+        self.assertEqual(surface.get_size(), atlas.get_text_size("Frame 1234"))
+        self.assertEqual(surface.get_height(), self.font.get_height())
+
+    def test_atlas_grows(self):
+        atlas = GlyphAtlas(self.font, (255, 255, 255), atlas_width=32)
+        text = "abcdefghijklmnopqrstuvwxyz"
+        surface = atlas.render(text)
+        self.assertGreater(atlas.surface.get_height(), atlas.height)
+        # the last glyph must have been drawn from the grown atlas
+        w = atlas.glyphs["z"][1]
+        last = surface.subsurface((surface.get_width() - w, 0, w, surface.get_height()))
+        self.assertGreater(pygame.mask.from_surface(last).count(), 0)
+
+    def test_shared_atlases(self):
+        self.assertIs(get_glyph_atlas(self.font, (1, 2, 3, 255)), get_glyph_atlas(self.font, pygame.Color(1, 2, 3)))
+        self.assertIsNot(get_glyph_atlas(self.font, (1, 2, 3)), get_glyph_atlas(self.font, (1, 2, 4)))
+
+    def test_atlases_are_limited(self):
+        glyphatlas.clear_glyph_atlases()
+        glyphatlas.set_glyph_atlas_limit(2)
+        try:
+            red = get_glyph_atlas(self.font, (255, 0, 0))
+            green = get_glyph_atlas(self.font, (0, 255, 0))
+            self.assertIs(get_glyph_atlas(self.font, (255, 0, 0)), red)
+            get_glyph_atlas(self.font, (0, 0, 255))
+            # green was used least recently
+            self.assertEqual(len(glyphatlas._atlases), 2)
+            self.assertIs(get_glyph_atlas(self.font, (255, 0, 0)), red)
+            self.assertIsNot(get_glyph_atlas(self.font, (0, 255, 0)), green)
+        finally:
+            glyphatlas.set_glyph_atlas_limit(32)
+            glyphatlas.clear_glyph_atlases()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+import unittest
+import pygame
+import json
+import tempfile
+from unittest import mock
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import graphics2d.framework as framework
+from graphics2d import *
+from graphics2d.scenetree.sceneitem import SceneItem
+from graphics2d.scenetree.canvasitem import CanvasColorRect
+from graphics2d.scenetree.canvascontainer import FreeLayoutContainer
+
+
+class CountingRect(CanvasColorRect):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.draws = 0
+
+    def on_draw(self, draw_surface):
+        self.draws += 1
+        super().on_draw(draw_surface)
+
+
+class TestHeadless(unittest.TestCase):
+
+    def setUp(self):
+        framework.settings['HEADLESS'] = True
+        framework.settings['WIDTH'] = 200
+        framework.settings['HEIGHT'] = 100
+        go()
+
+    def tearDown(self):
+        shutdown()
+        framework.settings['HEADLESS'] = False
+        framework.settings['FIXED_UPDATE_HZ'] = None
+        framework.settings['ALWAYS_REDRAW'] = True
+        framework.settings['DIRTY_RECTS'] = False
+
+    def test_screen_is_in_memory(self):
+        self.assertEqual(get_window_size(), Vector2(200, 100))
+
+    def test_run_frames_uses_fixed_timestep(self):
+        deltas = []
+        framework.hooks['on_update'] = deltas.append
+        self.assertTrue(run_frames(5, 20))
+        self.assertEqual(deltas, [20] * 5)
+
+    def test_fixed_update_rate(self):
+        framework.settings['FIXED_UPDATE_HZ'] = 100
+        deltas = []
+        framework.hooks['on_update'] = deltas.append
+        run_frames(1, 25)
+        # two 10ms steps, with 5ms carried over to the next frame
+        self.assertEqual(deltas, [10, 10])
+        self.assertAlmostEqual(get_interpolation_alpha(), 0.5)
+        run_frames(1, 5)
+        self.assertEqual(len(deltas), 3)
+
+    def test_fixed_update_catchup_limit(self):
+        framework.settings['FIXED_UPDATE_HZ'] = 100
+        deltas = []
+        framework.hooks['on_update'] = deltas.append
+        run_frames(1, 1000)
+        self.assertEqual(len(deltas), framework.settings['MAX_CATCHUP_STEPS'])
+        # the time we fell behind is dropped and not made up for later
+        run_frames(1, 0)
+        self.assertEqual(len(deltas), framework.settings['MAX_CATCHUP_STEPS'])
+
+    def test_scenetree_is_rendered(self):
+        root = FreeLayoutContainer(name="root", bgcolor=BLUE, size=(200, 100))
+        root.add_child(CanvasColorRect(name="rect", color=RED, position=Vector2(10, 10), size=(20, 20)))
+        get_scenetree().set_root(root)
+        run_frames(1)
+        screen = get_window_surface()
+        self.assertEqual(screen.get_at((15, 15)), RED)
+        self.assertEqual(screen.get_at((100, 50)), BLUE)
+
+    def test_container_repaints_only_dirty_children(self):
+        framework.settings['ALWAYS_REDRAW'] = False
+        root = FreeLayoutContainer(name="root", bgcolor=BLUE, size=(200, 100))
+        items = [CountingRect(name=str(i), color=RED, position=Vector2(i * 20, 0), size=(10, 10)) for i in range(10)]
+        for item in items:
+            root.add_child(item)
+        get_scenetree().set_root(root)
+        run_frames(1)
+        self.assertEqual([item.draws for item in items], [1] * 10)
+        screen = get_window_surface()
+        # paint over the area so we can tell what gets repainted
+        screen.fill(GREEN)
+        items[3].color = YELLOW
+        items[3].request_redraw()
+        run_frames(1)
+        self.assertEqual([item.draws for item in items], [1, 1, 1, 2, 1, 1, 1, 1, 1, 1])
+        self.assertEqual(screen.get_at((65, 5)), YELLOW)
+        self.assertEqual(screen.get_at((5, 5)), GREEN)
+        self.assertEqual(screen.get_at((100, 50)), GREEN)
+        # a full redraw request repaints everything
+        root.request_redraw()
+        run_frames(1)
+        self.assertEqual(screen.get_at((5, 5)), RED)
+        self.assertEqual(screen.get_at((100, 50)), BLUE)
+
+    def test_moving_item_in_place_is_drawn_at_new_position(self):
+        root = SceneItem(name="root")
+        rect = CanvasColorRect(name="rect", color=RED, position=Vector2(0, 0), size=(10, 10))
+        def move(dt):
+            rect.position.x += 10
+        rect.on_update = move
+        rect.set_process_update(True)
+        root.add_child(rect)
+        get_scenetree().set_root(root)
+        run_frames(5)
+        self.assertEqual(rect.get_viewport_position(), Vector2(50, 0))
+        screen = get_window_surface()
+        self.assertEqual(screen.get_at((55, 5)), RED)
+
+    def test_dirty_rects_are_merged_and_presented(self):
+        framework.settings['ALWAYS_REDRAW'] = False
+        framework.settings['DIRTY_RECTS'] = True
+        # items outside of containers are presented one by one
+        root = SceneItem(name="root")
+        items = [CountingRect(name="a", color=RED, position=Vector2(10, 10), size=(20, 20)),
+                 CountingRect(name="b", color=RED, position=Vector2(25, 25), size=(20, 20)),
+                 CountingRect(name="c", color=RED, position=Vector2(100, 50), size=(10, 10))]
+        for item in items:
+            root.add_child(item)
+        get_scenetree().set_root(root)
+        run_frames(1)
+        for item in items:
+            item.request_redraw()
+        updates = []
+        framework.settings['HEADLESS'] = False
+        try:
+            with mock.patch.object(pygame.display, 'update', side_effect=lambda rects: updates.append(list(rects))), \
+                 mock.patch.object(pygame.display, 'flip') as flip:
+                framework._run_frame(16)
+        finally:
+            framework.settings['HEADLESS'] = True
+        flip.assert_not_called()
+        # the overlapping areas of a and b are merged into their union
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(sorted(map(tuple, updates[0])), [(10, 10, 35, 35), (100, 50, 10, 10)])
+        self.assertEqual(framework._dirty_screen_rects, [])
+        self.assertEqual(get_window_surface().get_at((40, 40)), RED)
+
+    def test_merge_rects(self):
+        merged = framework._merge_rects([Rect(0, 0, 10, 10), Rect(20, 0, 10, 10), Rect(5, 5, 20, 2)])
+        self.assertEqual(merged, [Rect(0, 0, 30, 10)])
+        self.assertEqual(len(framework._merge_rects([Rect(0, 0, 10, 10), Rect(10, 0, 10, 10)])), 2)
+
+    def test_cache_as_bitmap(self):
+        framework.settings['ALWAYS_REDRAW'] = False
+        root = FreeLayoutContainer(name="root", bgcolor=BLUE, size=(200, 100))
+        cached = CountingRect(name="cached", color=RED, position=Vector2(10, 10), size=(20, 20), cache_as_bitmap=True)
+        root.add_child(cached)
+        get_scenetree().set_root(root)
+        run_frames(1)
+        root.request_redraw()
+        run_frames(1)
+        # the container was redrawn, but the cached item only blitted its surface
+        self.assertEqual(cached.draws, 1)
+        self.assertEqual(get_window_surface().get_at((15, 15)), RED)
+        cached.color = YELLOW
+        cached.request_redraw()
+        run_frames(1)
+        self.assertEqual(cached.draws, 2)
+        self.assertEqual(get_window_surface().get_at((15, 15)), YELLOW)
+        cached.on_resized(40, 40)
+        root.request_redraw()
+        run_frames(1)
+        self.assertEqual(cached.draws, 3)
+        self.assertEqual(get_window_surface().get_at((45, 45)), YELLOW)
+
+    def test_render_cache_budget(self):
+        from graphics2d.scenetree.rendercache import RenderCache
+        cache = RenderCache(budget=3 * 10 * 10 * 4)
+        items = [CanvasColorRect(size=(10, 10)) for i in range(4)]
+        for item in items:
+            item._render_cache = pygame.Surface((10, 10), pygame.SRCALPHA)
+            cache.store(item, item._render_cache)
+        # the least recently stored surface was dropped
+        self.assertIsNone(items[0]._render_cache)
+        self.assertIsNotNone(items[1]._render_cache)
+        self.assertEqual(cache.used, 3 * 10 * 10 * 4)
+        cache.touch(items[1])
+        cache.set_budget(2 * 10 * 10 * 4)
+        self.assertIsNone(items[2]._render_cache)
+        self.assertIsNotNone(items[1]._render_cache)
+
+    def test_profiler_records_phases_and_nodes(self):
+        profiler = enable_profiler(history=4, overlay=True)
+        try:
+            root = FreeLayoutContainer(name="root", bgcolor=BLUE, size=(200, 100))
+            root.add_child(CanvasColorRect(name="rect", color=RED, size=(20, 20)))
+            get_scenetree().set_root(root)
+            run_frames(6)
+            self.assertEqual(len(profiler.get_frame_times()), 4)
+            phases = profiler.get_phase_averages()
+            for phase in ('events', 'on_update', 'perform_updates', 'scenetree_drawing', 'overlay'):
+                self.assertIn(phase, phases)
+            names = [(name, callback) for name, callback, avg, peak in profiler.get_slowest_nodes()]
+            self.assertIn(("root", "on_draw"), names)
+            self.assertIn(("rect", "on_draw"), names)
+            # CanvasColorRect doesn't override on_update, so it isn't updated at all
+            self.assertNotIn(("rect", "on_update"), names)
+        finally:
+            disable_profiler()
+
+    def test_trace_is_valid_chrome_trace(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "trace.json")
+            start_trace(filename)
+            try:
+                root = FreeLayoutContainer(name="root", size=(200, 100))
+                root.add_child(CanvasColorRect(name="rect", color=RED, size=(20, 20)))
+                get_scenetree().set_root(root)
+                run_frames(3)
+            finally:
+                disable_profiler()
+            with open(filename) as f:
+                events = json.load(f)
+        names = [event['name'] for event in events]
+        self.assertEqual(names.count("frame"), 3)
+        self.assertIn("scenetree_drawing", names)
+        self.assertIn("rect.on_draw", names)
+
+    def test_trace_applies_per_node_to_running_profiler(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = enable_profiler(per_node=False)
+            try:
+                start_trace(os.path.join(tmpdir, "trace.json"))
+                self.assertFalse(profiler.per_node)
+                start_trace(os.path.join(tmpdir, "trace2.json"), per_node=True)
+                self.assertIs(get_profiler(), profiler)
+                self.assertTrue(profiler.per_node)
+            finally:
+                disable_profiler()
+
+    def test_quit_stops_frames(self):
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        self.assertFalse(run_frames(3))
+
+
+class TestHeadlessEnvironment(unittest.TestCase):
+
+    def setUp(self):
+        framework.settings['HEADLESS'] = True
+
+    def tearDown(self):
+        framework.settings['HEADLESS'] = False
+
+    def test_video_driver_is_restored(self):
+        with mock.patch.dict(os.environ):
+            os.environ['SDL_VIDEODRIVER'] = 'x11'
+            go()
+            self.assertEqual(os.environ['SDL_VIDEODRIVER'], 'dummy')
+            shutdown()
+            self.assertEqual(os.environ['SDL_VIDEODRIVER'], 'x11')
+            del os.environ['SDL_VIDEODRIVER']
+            go()
+            shutdown()
+            self.assertNotIn('SDL_VIDEODRIVER', os.environ)
+
+
+if __name__ == '__main__':
+    unittest.main()
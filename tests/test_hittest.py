@@ -0,0 +1,55 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from pygame import Rect
+from pygame.math import Vector2
+from graphics2d.scenetree.canvasitem import CanvasRectAreaItem
+from graphics2d.scenetree.canvascontainer import FreeLayoutContainer
+from graphics2d.scenetree.spatialindex import GridIndex
+
+
+class TestHitTest(unittest.TestCase):
+
+    def make_container(self, **kwargs):
+        container = FreeLayoutContainer(name="container", position=Vector2(100, 100), size=(500, 500), **kwargs)
+        self.bottom = CanvasRectAreaItem(name="bottom", position=Vector2(0, 0), size=(100, 100))
+        self.top = CanvasRectAreaItem(name="top", position=Vector2(50, 50), size=(100, 100))
+        container.add_child(self.bottom)
+        container.add_child(self.top)
+        return container
+
+    def check_hits(self, container):
+        self.assertIs(container.get_child_at((110, 110)), self.bottom)
+        # the overlapping area belongs to the child drawn last
+        self.assertIs(container.get_child_at((175, 175)), self.top)
+        self.assertIsNone(container.get_child_at((50, 50)))
+        self.assertIsNone(container.get_child_at((400, 400)))
+        # moving a child is picked up
+        self.top.position = Vector2(300, 300)
+        self.assertIs(container.get_child_at((175, 175)), self.bottom)
+        self.assertIs(container.get_child_at((450, 450)), self.top)
+        self.top.on_resized(10, 10)
+        self.assertIsNone(container.get_child_at((450, 450)))
+        container.remove_child(self.bottom)
+        self.assertIsNone(container.get_child_at((110, 110)))
+
+    def test_linear_scan(self):
+        self.check_hits(self.make_container())
+
+    def test_spatial_index(self):
+        self.check_hits(self.make_container(spatial_index=32))
+
+    def test_oversized_items(self):
+        index = GridIndex(cell_size=10)
+        index.insert(0, "small", Rect(5, 5, 10, 10))
+        index.insert(1, "huge", Rect(0, 0, 1000, 1000))
+        index.insert(2, "small on top", Rect(500, 500, 10, 10))
+        self.assertEqual(index.find_topmost(7, 7), "huge")
+        self.assertEqual(index.find_topmost(505, 505), "small on top")
+        self.assertIsNone(index.find_topmost(2000, 5))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import sys, os, os.path
+import shutil
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d.imagecache import ImageCache
+
+ASSETS = os.path.join(os.path.dirname(__file__), "..", "graphics2d", "assets")
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.icon = os.path.join(self.tempdir, "icon.png")
+        shutil.copy(os.path.join(ASSETS, "icon.png"), self.icon)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_loads_are_shared(self):
+        cache = ImageCache()
+        a = cache.load(self.icon)
+        b = cache.load(os.path.join(self.tempdir, "..", os.path.basename(self.tempdir), "icon.png"))
+        self.assertIs(a, b)
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(list(cache.get_memory_usage().values()), [stats['bytes']])
+
+    def test_changed_file_is_reloaded(self):
+        cache = ImageCache()
+        a = cache.load(self.icon)
+        shutil.copy(os.path.join(ASSETS, "icon32x32.png"), self.icon)
+        os.utime(self.icon, ns=(0, os.stat(self.icon).st_mtime_ns + 1000000))
+        b = cache.load(self.icon)
+        self.assertIsNot(a, b)
+        self.assertEqual(b.get_size(), (32, 32))
+        self.assertEqual(cache.get_stats()['entries'], 1)
+
+    def test_async_load(self):
+        cache = ImageCache()
+        placeholder = pygame.Surface((1, 1))
+        future = cache.load_async(self.icon, placeholder)
+        self.assertIs(cache.load_async(self.icon), future)
+        surface = future.result()
+        self.assertIs(future.surface, surface)
+        self.assertIs(cache.load(self.icon), surface)
+        self.assertEqual(cache.get_stats()['pending'], 0)
+        cache.shutdown()
+
+    def test_budget_and_unload(self):
+        peach = os.path.join(ASSETS, "peach-icon1.png")
+        cache = ImageCache()
+        cache.load(self.icon)
+        cache.load(peach)
+        cache.set_budget(cache.get_memory_usage()[os.path.normcase(os.path.realpath(peach))])
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        cache.unload(peach)
+        self.assertEqual(cache.get_stats()['entries'], 0)
+        self.assertEqual(cache.used, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import pygame
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from graphics2d.scenetree import SceneTree, SceneItem, CanvasItem
+from graphics2d.scenetree.canvasitem import CanvasRectAreaItem
+from pygame.math import Vector2
+
+
+class Listener(CanvasItem):
+    def __init__(self, log, consume=False, **kwargs):
+        super().__init__(**kwargs)
+        self.log = log
+        self.consume = consume
+
+    def on_input(self, event):
+        self.log.append(self.name)
+        if self.consume:
+            self.consume_event()
+
+
+class Area(CanvasRectAreaItem):
+    def __init__(self, log, **kwargs):
+        super().__init__(**kwargs)
+        self.log = log
+
+    def on_gui_input(self, event):
+        self.log.append(self.name)
+
+
+def click(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+def key():
+    return pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a, mod=0, unicode='a', scancode=0)
+
+
+class TestInputRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.log = []
+        self.tree = SceneTree()
+        self.root = SceneItem(name="root")
+        self.tree.set_root(self.root)
+
+    def send(self, event):
+        self.tree.event_consumed = False
+        self.tree.handle_input(event, self.tree.root)
+
+    def test_only_overriding_items_are_registered(self):
+        static = CanvasItem(name="static")
+        listener = Listener(self.log, name="listener")
+        self.root.add_child(static)
+        static.add_child(listener)
+        self.assertEqual(self.tree._get_input_order(), [listener])
+        self.send(key())
+        self.assertEqual(self.log, ["listener"])
+
+    def test_children_before_parents_until_consumed(self):
+        parent = Listener(self.log, name="parent")
+        self.root.add_child(parent)
+        parent.add_child(Listener(self.log, name="a"))
+        parent.add_child(Listener(self.log, consume=True, name="b"))
+        parent.add_child(Listener(self.log, name="c"))
+        self.send(key())
+        self.assertEqual(self.log, ["a", "b"])
+
+    def test_filtered_events(self):
+        self.root.add_child(Listener(self.log, name="keys", filtered_events=(pygame.KEYDOWN,)))
+        self.root.add_child(Listener(self.log, name="all"))
+        self.send(click((0, 0)))
+        self.assertEqual(self.log, ["all"])
+        self.log.clear()
+        self.send(key())
+        self.assertEqual(self.log, ["keys", "all"])
+
+    def test_set_filtered_events_in_tree(self):
+        listener = Listener(self.log, name="listener")
+        self.root.add_child(listener)
+        listener.set_filtered_events((pygame.KEYUP,))
+        self.send(key())
+        self.assertEqual(self.log, [])
+
+    def test_disable_and_enable(self):
+        listener = Listener(self.log, name="listener")
+        self.root.add_child(listener)
+        listener.set_process_input(False)
+        self.send(key())
+        self.assertEqual(self.log, [])
+        listener.set_process_input(None)
+        self.send(key())
+        self.assertEqual(self.log, ["listener"])
+
+    def test_removed_items_are_unregistered(self):
+        listener = Listener(self.log, name="listener")
+        self.root.add_child(listener)
+        self.root.remove_child(listener)
+        self.send(key())
+        self.assertEqual(self.log, [])
+        self.assertEqual(self.tree._get_input_order(), [])
+
+    def test_removal_during_dispatch(self):
+        second = Listener(self.log, name="second")
+        first = Listener(self.log, name="first")
+        self.root.add_child(first)
+        self.root.add_child(second)
+        first.on_input = lambda event: self.root.remove_child(second)
+        self.tree._input_registration(first)
+        self.send(key())
+        self.assertEqual(self.log, [])
+
+    def test_pointer_events_go_to_hit_items_only(self):
+        self.root.add_child(Area(self.log, name="left", position=Vector2(0, 0), size=(50, 50)))
+        self.root.add_child(Area(self.log, name="right", position=Vector2(50, 0), size=(50, 50)))
+        self.send(click((60, 10)))
+        self.assertEqual(self.log, ["right"])
+        self.log.clear()
+        self.send(click((10, 80)))
+        self.assertEqual(self.log, [])
+
+    def test_key_events_go_to_focused_item(self):
+        area = Area(self.log, name="area", size=(50, 50))
+        self.root.add_child(area)
+        self.send(key())
+        self.assertEqual(self.log, [])
+        area.grab_focus()
+        self.send(key())
+        self.assertEqual(self.log, ["area"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from pygame.math import Vector2
+from graphics2d.scenetree import SceneTree, VBoxContainer, HBoxContainer, PanelContainer
+from graphics2d.scenetree.canvasitem import CanvasColorRect
+from graphics2d.scenetree.label import Label
+from graphics2d.drawing import get_font, get_default_fontname
+
+
+class CountingVBox(VBoxContainer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layouts = 0
+
+    def layout(self):
+        self.layouts += 1
+        super().layout()
+
+
+class MeasuredRect(CanvasColorRect):
+    def __init__(self, **kwargs):
+        self.measurements = 0
+        self.lookups = 0
+        super().__init__(**kwargs)
+        self.content_size = (10, 10)
+
+    def get_content_min_size(self):
+        self.measurements += 1
+        return self.content_size
+
+    def get_min_size(self):
+        self.lookups += 1
+        return super().get_min_size()
+
+
+def make_rows(n):
+    return [CanvasColorRect(name="row{}".format(i), min_size=(10, 10), max_size=(None, 10)) for i in range(n)]
+
+
+class TestDeferredLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = SceneTree()
+        self.box = CountingVBox(name="box", size=Vector2(100, 1000))
+        self.tree.set_root(self.box)
+        self.tree.flush_layouts()
+        self.box.layouts = 0
+
+    def test_add_children_lays_out_once(self):
+        rows = make_rows(100)
+        self.box.add_children(rows)
+        self.assertEqual(self.box.layouts, 1)
+        # the layout has been performed when add_children returns
+        self.assertEqual(rows[99].position, Vector2(0, 990))
+
+    def test_layouts_are_coalesced_until_flushed(self):
+        for row in make_rows(50):
+            self.box.add_child(row)
+        self.assertEqual(self.box.layouts, 0)
+        self.tree.flush_layouts()
+        self.assertEqual(self.box.layouts, 1)
+        self.tree.flush_layouts()
+        self.assertEqual(self.box.layouts, 1)
+
+    def test_suspend_layout(self):
+        with self.tree.suspend_layout():
+            with self.tree.suspend_layout():
+                self.box.add_child(make_rows(1)[0])
+            self.tree.flush_layouts()
+            self.assertEqual(self.box.layouts, 0)
+        self.assertEqual(self.box.layouts, 1)
+
+    def test_nested_containers_are_laid_out_once(self):
+        inner = CountingVBox(name="inner", min_size=(10, 100))
+        self.box.add_child(inner)
+        inner.add_children(make_rows(5))
+        inner.layouts = self.box.layouts = 0
+        with self.tree.suspend_layout():
+            self.box.add_child(make_rows(1)[0])
+            inner.add_child(make_rows(1)[0])
+        # laying out the outer box resizes and thereby lays out the inner one
+        self.assertEqual(self.box.layouts, 1)
+        self.assertEqual(inner.layouts, 1)
+
+
+class TestMinSizeCache(unittest.TestCase):
+
+    def setUp(self):
+        # a chain of nested boxes with a single leaf at the bottom
+        self.tree = SceneTree()
+        self.boxes = [CountingVBox(name="box0", size=Vector2(100, 100))]
+        for i in range(1, 10):
+            box = CountingVBox(name="box{}".format(i))
+            self.boxes[-1].add_child(box)
+            self.boxes.append(box)
+        self.leaf = MeasuredRect(name="leaf")
+        self.boxes[-1].add_child(self.leaf)
+        self.tree.set_root(self.boxes[0])
+        self.tree.flush_layouts()
+
+    def test_resize_uses_cached_measurements(self):
+        self.leaf.measurements = 0
+        for box in self.boxes:
+            box.layouts = 0
+        self.boxes[0].on_resized(200, 300)
+        self.assertEqual(self.leaf.measurements, 0)
+        # every box is laid out exactly once
+        self.assertEqual([box.layouts for box in self.boxes], [1] * 10)
+        self.assertEqual(self.boxes[5].size, Vector2(10, 300))
+
+    def test_invalidation_reaches_ancestors(self):
+        self.assertEqual(self.boxes[0].get_min_size(), (10, 10))
+        self.leaf.content_size = (50, 60)
+        self.leaf.invalidate_min_size()
+        self.assertEqual(self.boxes[0].get_min_size(), (50, 60))
+        self.tree.flush_layouts()
+        self.assertEqual(self.leaf.size, Vector2(50, 100))
+        self.assertEqual(self.leaf.measurements, 2)
+
+    def test_changing_constraints_relayouts(self):
+        self.leaf.min_size = (0, 40)
+        self.assertEqual(self.boxes[3].get_min_size(), (10, 40))
+        for box in self.boxes:
+            box.layouts = 0
+        self.tree.flush_layouts()
+        self.assertEqual([box.layouts for box in self.boxes], [1] * 10)
+
+    def test_unchanged_min_size_stops_at_container(self):
+        self.boxes[5].min_size = (80, 80)
+        self.tree.flush_layouts()
+        for box in self.boxes:
+            box.layouts = 0
+        self.leaf.content_size = (20, 20)
+        self.leaf.invalidate_min_size()
+        self.tree.flush_layouts()
+        # box5's minimum size is still its own, so the boxes above it keep their layout
+        self.assertEqual([box.layouts for box in self.boxes], [0] * 5 + [1] * 5)
+        self.assertEqual(self.leaf.size, Vector2(20, 100))
+
+    def test_measurements_stay_linear(self):
+        # adding rows one by one to a nested box looks at each row a bounded number of times,
+        # instead of measuring the whole box again after every row
+        for n in (100, 400):
+            inner = VBoxContainer(name="inner")
+            self.boxes[-1].add_child(inner)
+            self.tree.flush_layouts()
+            rows = [MeasuredRect(name="row{}".format(i)) for i in range(n)]
+            for row in rows:
+                inner.add_child(row)
+            self.tree.flush_layouts()
+            self.assertLessEqual(sum(row.measurements for row in rows), 2 * n)
+            self.assertLessEqual(sum(row.lookups for row in rows), 5 * n)
+            self.assertEqual(self.boxes[0].get_min_size(), (10, 10 + 10 * n))
+            self.boxes[-1].remove_child(inner)
+
+    def test_container_attributes_invalidate(self):
+        panel = PanelContainer(name="panel")
+        self.boxes[-1].add_child(panel)
+        self.tree.flush_layouts()
+        self.assertEqual(panel.get_min_size(), (0, 0))
+        panel.margins = (50, 50, 50, 50)
+        self.assertEqual(panel.get_min_size(), (100, 100))
+        self.boxes[9].separation = 5
+        self.assertEqual(self.boxes[0].get_min_size(), (100, 115))
+        self.boxes[9].orientation = HBoxContainer.HORIZONTAL
+        self.assertEqual(self.boxes[0].get_min_size(), (115, 100))
+
+    def test_label_font_invalidates(self):
+        pygame.font.init()
+        label = Label(name="label", text="Hello", font=get_font(get_default_fontname(), 12))
+        self.boxes[-1].add_child(label)
+        self.tree.flush_layouts()
+        small = label.get_min_size()
+        label.font = get_font(get_default_fontname(), 40)
+        self.assertGreater(label.get_min_size()[1], small[1])
+        self.assertGreater(self.boxes[0].get_min_size()[1], small[1] + 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
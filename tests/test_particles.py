@@ -0,0 +1,56 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d.scenetree import particles
+from graphics2d.scenetree.particles import ParticleSystem, Emitter
+
+
+@unittest.skipIf(particles.np is None, "numpy is not installed")
+class TestParticleSystem(unittest.TestCase):
+
+    def test_emission_rate(self):
+        ps = ParticleSystem(size=(100, 100), seed=1)
+        ps.add_emitter(Emitter(rate=100, lifetime=(10, 10)))
+        for i in range(10):
+            ps.on_update(50)
+        self.assertEqual(ps.count, 50)
+
+    def test_dead_particles_are_recycled(self):
+        ps = ParticleSystem(size=(100, 100), capacity=100, seed=1)
+        short = Emitter(lifetime=(0.1, 0.1), colors=[(255, 0, 0)])
+        long = Emitter(lifetime=(1, 1), colors=[(0, 255, 0)])
+        ps.emit(short, 60)
+        ps.emit(long, 60)
+        self.assertEqual(ps.count, 100)
+        ps.on_update(200)
+        self.assertEqual(ps.count, 40)
+        # the survivors are the long living ones
+        self.assertTrue((ps._colors[:40] == 0x00ff00).all())
+        ps.emit(short, 60)
+        self.assertEqual(ps.count, 100)
+
+    def test_motion_and_drawing(self):
+        ps = ParticleSystem(size=(100, 100), gravity=(0, 100), bgcolor=(0, 0, 0), particle_size=2, seed=1)
+        ps.emit(Emitter(position=(10, 10), speed=(100, 100), angle=(0, 0), colors=[(255, 255, 0)]), 1)
+        ps.on_update(100)
+        x, y = ps._positions[0]
+        self.assertAlmostEqual(x, 20, places=4)
+        self.assertAlmostEqual(y, 11, places=4)
+        for surface in (pygame.Surface((100, 100)), pygame.Surface((100, 100), pygame.SRCALPHA),
+                        pygame.Surface((100, 100), depth=24)):
+            ps.on_draw(surface)
+            self.assertEqual(tuple(surface.get_at((21, 12))), (255, 255, 0, 255))
+            self.assertEqual(tuple(surface.get_at((22, 13)))[:3], (0, 0, 0))
+
+    def test_particles_outside_are_not_drawn(self):
+        ps = ParticleSystem(size=(10, 10), seed=1)
+        ps.emit(Emitter(position=(-5, 50), speed=(0, 0)), 10)
+        surface = pygame.Surface((10, 10))
+        ps.on_draw(surface)
+        self.assertEqual(pygame.mask.from_threshold(surface, (0, 0, 0), (1, 1, 1, 255)).count(), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
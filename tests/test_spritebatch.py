@@ -0,0 +1,41 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d.drawing import SpriteBatch, draw_surfaces
+
+
+class TestSpriteBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.target = pygame.Surface((50, 50))
+        self.sprite = pygame.Surface((5, 5))
+        self.sprite.fill((255, 0, 0))
+
+    def test_draw_surfaces(self):
+        draw_surfaces(self.target, [(self.sprite, (i * 10, 0)) for i in range(5)])
+        for i in range(5):
+            self.assertEqual(tuple(self.target.get_at((i * 10 + 2, 2)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(self.target.get_at((7, 2)))[:3], (0, 0, 0))
+
+    def test_batch_flushes_once(self):
+        batch = SpriteBatch(self.target)
+        batch.add(self.sprite, (0, 0))
+        batch.add(self.sprite, (20, 20), pygame.Rect(0, 0, 2, 2))
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(tuple(self.target.get_at((0, 0)))[:3], (0, 0, 0))
+        batch.flush()
+        self.assertEqual(len(batch), 0)
+        self.assertEqual(tuple(self.target.get_at((0, 0)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(self.target.get_at((21, 21)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(self.target.get_at((23, 23)))[:3], (0, 0, 0))
+
+    def test_context_manager(self):
+        with SpriteBatch(self.target) as batch:
+            batch.extend([(self.sprite, (40, 40))])
+        self.assertEqual(tuple(self.target.get_at((42, 42)))[:3], (255, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d.drawing import TextCache
+
+
+class TestTextCache(unittest.TestCase):
+
+    def setUp(self):
+        pygame.font.init()
+        self.font = pygame.font.Font(None, 16)
+
+    def test_hits_and_misses(self):
+        cache = TextCache()
+        a = cache.render(self.font, "Score: 10", pygame.Color(255, 0, 0))
+        # the same color given as a tuple is the same key
+        b = cache.render(self.font, "Score: 10", (255, 0, 0, 255))
+        self.assertIs(a, b)
+        cache.render(self.font, "Score: 10", (255, 0, 0), background=(0, 0, 0))
+        cache.render(self.font, "Score: 10", (255, 0, 0), antialias=False)
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['entries'], 3)
+
+    def test_budget_evicts_least_recently_used(self):
+        white = (255, 255, 255)
+        sizes = {}
+        for text in ("first", "second", "third"):
+            surface = self.font.render(text, True, white)
+            sizes[text] = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        cache = TextCache(budget=sizes["first"] + max(sizes["second"], sizes["third"]))
+        first = cache.render(self.font, "first", white)
+        cache.render(self.font, "second", white)
+        self.assertIs(cache.render(self.font, "first", white), first)
+        # "second" is now the least recently used entry and has to make room
+        cache.render(self.font, "third", white)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIs(cache.render(self.font, "first", white), first)
+        self.assertEqual(cache.used, sizes["first"] + sizes["third"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys, os, os.path
+import json
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from graphics2d.textureatlas import TextureAtlas
+
+
+def make_sheet():
+    # a 3x2 grid of 10x10 frames, each filled with its own color
+    sheet = pygame.Surface((30, 20))
+    for y in range(2):
+        for x in range(3):
+            sheet.fill((x * 100, y * 100, 50), (x * 10, y * 10, 10, 10))
+    return sheet
+
+
+class TestTextureAtlas(unittest.TestCase):
+
+    def test_grid(self):
+        sheet = make_sheet()
+        atlas = TextureAtlas.from_grid(sheet, (10, 10))
+        self.assertEqual(len(atlas), 6)
+        frame = atlas[(2, 1)]
+        self.assertEqual(frame.get_size(), (10, 10))
+        self.assertEqual(tuple(frame.get_at((0, 0)))[:3], (200, 100, 50))
+        # frames share the pixels of the sheet
+        self.assertIs(frame.get_parent(), sheet)
+
+    def test_named_grid(self):
+        atlas = TextureAtlas.from_grid(make_sheet(), (10, 10), {"a": (0, 0), "b": (1, 1)})
+        self.assertEqual(sorted(atlas.names()), ["a", "b"])
+        self.assertEqual(atlas.get_rect("b"), pygame.Rect(10, 10, 10, 10))
+
+    def test_json(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            pygame.image.save(make_sheet(), os.path.join(tempdir, "sheet.png"))
+            filename = os.path.join(tempdir, "sheet.json")
+            with open(filename, "w") as f:
+                json.dump({"frames": {"first": {"frame": {"x": 0, "y": 0, "w": 10, "h": 10}},
+                                      "last": {"frame": {"x": 20, "y": 10, "w": 10, "h": 10}}},
+                           "meta": {"image": "sheet.png"}}, f)
+            atlas = TextureAtlas.from_json(filename)
+            self.assertEqual(tuple(atlas["last"].get_at((5, 5)))[:3], (200, 100, 50))
+        finally:
+            for name in os.listdir(tempdir):
+                os.remove(os.path.join(tempdir, name))
+            os.rmdir(tempdir)
+
+    def test_pack(self):
+        images = {}
+        for i in range(10):
+            image = pygame.Surface((20 + i, 10 + i))
+            image.fill((i * 20, 0, 0))
+            images[i] = image
+        atlas = TextureAtlas.pack(images, max_width=64)
+        self.assertLessEqual(atlas.surface.get_width(), 64)
+        rects = [atlas.get_rect(i) for i in range(10)]
+        for i, rect in enumerate(rects):
+            self.assertEqual(rect.size, images[i].get_size())
+            self.assertEqual(rect.collidelist(rects[:i] + rects[i+1:]), -1)
+            self.assertEqual(tuple(atlas[i].get_at((0, 0)))[:3], (i * 20, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from graphics2d.scenetree import SceneTree, SceneItem, CanvasItem, CanvasContainer
+
+
+def recursive_postorder(item):
+    for child in reversed(item.children):
+        yield from recursive_postorder(child)
+    yield item
+
+def recursive_preorder(item):
+    yield item
+    for child in item.children:
+        yield from recursive_preorder(child)
+
+
+class TestTraversal(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = SceneTree()
+        self.root = SceneItem(name="root")
+        self.tree.set_root(self.root)
+        a = SceneItem(name="a")
+        b = CanvasItem(name="b")
+        c = CanvasContainer(name="c")
+        self.root.add_child(a)
+        self.root.add_child(b)
+        a.add_child(SceneItem(name="a1"))
+        a.add_child(c)
+        c.add_child(CanvasItem(name="c1"))
+        b.add_child(CanvasItem(name="b1"))
+
+    def names(self, items):
+        return [item.name for item in items]
+
+    def test_preorder(self):
+        self.assertEqual(self.names(self.tree.depthfirst_preorder()),
+                         self.names(recursive_preorder(self.root)))
+
+    def test_postorder(self):
+        self.assertEqual(self.names(self.tree.depthfirst_postorder()),
+                         self.names(recursive_postorder(self.root)))
+        a = self.root.children[0]
+        self.assertEqual(self.names(self.tree.depthfirst_postorder(a)),
+                         self.names(recursive_postorder(a)))
+
+    def test_canvasitem_roots(self):
+        self.assertEqual(self.names(self.tree.canvasitem_roots()), ["b", "c"])
+
+    def test_container_roots(self):
+        self.assertEqual(self.names(self.tree.container_roots()), ["b1", "b", "c"])
+
+    def test_cache_follows_tree_changes(self):
+        before = self.names(self.tree.depthfirst_postorder())
+        new = SceneItem(name="new")
+        self.root.children[0].add_child(new)
+        self.assertEqual(self.names(self.tree.depthfirst_postorder()),
+                         self.names(recursive_postorder(self.root)))
+        self.root.children[0].remove_child(new)
+        self.assertEqual(self.names(self.tree.depthfirst_postorder()), before)
+
+    def test_deep_tree(self):
+        node = self.root
+        for i in range(5000):
+            child = SceneItem(name=str(i))
+            node.add_child(child)
+            node = child
+        self.assertEqual(sum(1 for item in self.tree.depthfirst_postorder()), 5007)
+        self.assertEqual(sum(1 for item in self.tree.depthfirst_preorder()), 5007)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from graphics2d.scenetree import SceneTree, SceneItem, CanvasItem
+
+
+class Counter(CanvasItem):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.updates = 0
+
+    def on_update(self, dt):
+        self.updates += 1
+
+
+class TestUpdateRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = SceneTree()
+        self.root = SceneItem(name="root")
+        self.tree.set_root(self.root)
+        self.static = CanvasItem(name="static")
+        self.counter = Counter(name="counter")
+        self.root.add_child(self.static)
+        self.static.add_child(self.counter)
+
+    def test_only_overriding_items_are_registered(self):
+        self.assertEqual(self.tree._get_update_order(), [self.counter])
+        self.tree.perform_updates(16)
+        self.assertEqual(self.counter.updates, 1)
+
+    def test_disable_and_enable(self):
+        self.counter.set_process_update(False)
+        self.tree.perform_updates(16)
+        self.assertEqual(self.counter.updates, 0)
+        self.counter.set_process_update(True)
+        self.tree.perform_updates(16)
+        self.assertEqual(self.counter.updates, 1)
+
+    def test_opt_in(self):
+        calls = []
+        self.static.on_update = calls.append
+        self.static.set_process_update(True)
+        self.tree.perform_updates(16)
+        self.assertEqual(calls, [16])
+
+    def test_removed_items_are_unregistered(self):
+        self.root.remove_child(self.static)
+        self.tree.perform_updates(16)
+        self.assertEqual(self.counter.updates, 0)
+        self.assertEqual(self.tree._get_update_order(), [])
+
+    def test_removal_during_update(self):
+        other = Counter(name="other")
+        self.root.add_child(other)
+        # the last child is updated first and removes the subtree holding the counter
+        other.on_update = lambda dt: self.root.remove_child(self.static)
+        self.tree.perform_updates(16)
+        self.assertEqual(self.counter.updates, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from pygame.math import Vector2
+from graphics2d.scenetree import SceneItem, CanvasItem
+
+
+class TestViewportPosition(unittest.TestCase):
+
+    def setUp(self):
+        self.a = CanvasItem(name="a", position=Vector2(10, 10))
+        self.plain = SceneItem(name="plain")
+        self.b = CanvasItem(name="b", position=(5, 0))
+        self.c = CanvasItem(name="c", position=(1, 2))
+        self.a.add_child(self.plain)
+        self.plain.add_child(self.b)
+        self.b.add_child(self.c)
+
+    def test_position_is_sum_of_ancestors(self):
+        self.assertEqual(self.c.get_viewport_position(), Vector2(16, 12))
+
+    def test_moving_ancestor_updates_descendants(self):
+        self.assertEqual(self.c.get_viewport_position(), Vector2(16, 12))
+        self.a.position = Vector2(0, 0)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(6, 2))
+        self.b.position += Vector2(1, 1)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(7, 3))
+
+    def test_reparenting_updates_position(self):
+        self.assertEqual(self.c.get_viewport_position(), Vector2(16, 12))
+        self.b.remove_child(self.c)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(1, 2))
+        self.a.add_child(self.c)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(11, 12))
+
+    def test_changing_position_in_place(self):
+        self.assertEqual(self.c.get_viewport_position(), Vector2(16, 12))
+        self.a.position.x += 10
+        self.assertEqual(self.c.get_viewport_position(), Vector2(26, 12))
+        self.b.position[1] = 5
+        self.assertEqual(self.c.get_viewport_position(), Vector2(26, 17))
+        self.b.position.update(0, 0)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(21, 12))
+        offset = Vector2(1, 1)
+        position = self.c.position
+        position += offset
+        self.assertEqual(self.c.get_viewport_position(), Vector2(22, 13))
+
+    def test_position_is_not_shared(self):
+        shared = Vector2(3, 3)
+        self.c.position = shared
+        self.b.position = self.c.position
+        self.b.position.x = 0
+        self.assertEqual(self.c.position, Vector2(3, 3))
+        self.assertEqual(shared, Vector2(3, 3))
+        # vectors calculated from a position don't move the item
+        moved = self.c.position + Vector2(1, 1)
+        moved.x = 100
+        self.assertEqual(self.c.get_viewport_position(), Vector2(13, 16))
+
+    def test_returned_position_is_a_copy(self):
+        p = self.c.get_viewport_position()
+        p += Vector2(100, 100)
+        self.assertEqual(self.c.get_viewport_position(), Vector2(16, 12))
+
+    def test_deep_chain(self):
+        node = self.c
+        for i in range(5000):
+            child = CanvasItem(position=(1, 0))
+            node.add_child(child)
+            node = child
+        self.assertEqual(node.get_viewport_position(), Vector2(5016, 12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import unittest
+import sys, os.path
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+import pygame
+from pygame.math import Vector2
+import graphics2d.framework as framework
+from graphics2d import *
+from graphics2d.scenetree import VirtualListContainer, SceneTree, VBoxContainer, PanelContainer
+from graphics2d.scenetree.canvasitem import CanvasColorRect
+from graphics2d.scenetree.label import Label
+import graphics2d.constants as G2D
+
+
+def create_row():
+    return CanvasColorRect()
+
+def bind_row(row, index):
+    row.index = index
+    row.color = Color(index % 256, 0, 0)
+
+
+class TestVirtualList(unittest.TestCase):
+
+    def test_only_visible_rows_exist(self):
+        rows = VirtualListContainer(size=(100, 95), item_count=100000, row_height=10,
+                                    create_row=create_row, bind_row=bind_row)
+        rows.layout()
+        self.assertEqual(sorted(rows._active_rows), list(range(10)))
+        self.assertEqual(len(rows.children), 10)
+        rows.scroll_to(50005)
+        self.assertEqual(sorted(rows._active_rows), list(range(5000, 5010)))
+        # rows have been reused, not created
+        self.assertEqual(len(rows.children), 10)
+        self.assertEqual(rows._active_rows[5000].position, Vector2(0, -5))
+        self.assertEqual(rows._active_rows[5000].index, 5000)
+
+    def test_scrolling_is_clamped(self):
+        rows = VirtualListContainer(size=(100, 100), item_count=50, row_height=10,
+                                    create_row=create_row, bind_row=bind_row)
+        rows.scroll_to(10000)
+        self.assertEqual(rows.scroll_offset, 400)
+        self.assertEqual(max(rows._active_rows), 49)
+        rows.scroll_to(-10)
+        self.assertEqual(rows.scroll_offset, 0)
+
+    def test_variable_heights(self):
+        rows = VirtualListContainer(size=(100, 100), item_count=1000, row_height=lambda i: 10 + i % 3,
+                                    create_row=create_row, bind_row=bind_row)
+        self.assertEqual(rows.get_content_height(), sum(10 + i % 3 for i in range(1000)))
+        self.assertEqual(rows.get_index_at(0), 0)
+        self.assertEqual(rows.get_index_at(10), 1)
+        self.assertEqual(rows.get_index_at(20), 1)
+        self.assertEqual(rows.get_index_at(21), 2)
+        rows.scroll_to_index(500)
+        self.assertEqual(rows._active_rows[500].position, Vector2(0, 0))
+        self.assertEqual(rows._active_rows[500].size, Vector2(100, 12))
+
+    def test_child_at_is_limited_to_the_list(self):
+        rows = VirtualListContainer(position=Vector2(0, 100), size=(100, 95), item_count=100, row_height=10,
+                                    create_row=create_row, bind_row=bind_row)
+        rows.scroll_to(5)
+        # the first row starts above the list, but is only hit inside it
+        self.assertIs(rows.get_child_at((10, 100)), rows._active_rows[0])
+        self.assertIsNone(rows.get_child_at((10, 97)))
+        self.assertIs(rows.get_child_at((10, 194)), rows._active_rows[9])
+        self.assertIsNone(rows.get_child_at((10, 196)))
+        self.assertIsNone(rows.get_child_at((-1, 150)))
+        self.assertIsNone(rows.get_child_at((100, 150)))
+
+
+class CountingVBox(VBoxContainer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.layouts = 0
+
+    def layout(self):
+        self.layouts += 1
+        super().layout()
+
+
+class UpdatingRow(CanvasColorRect):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.updates = 0
+
+    def on_update(self, dt):
+        self.updates += 1
+
+
+class TestVirtualListInTree(unittest.TestCase):
+
+    def test_rebinding_rows_doesnt_relayout_ancestors(self):
+        pygame.font.init()
+        tree = SceneTree()
+        box = CountingVBox(name="box", size=Vector2(200, 200))
+        panel = PanelContainer(name="panel", flags=G2D.V_EXPAND)
+        rows = VirtualListContainer(min_size=(100, 100), item_count=1000, row_height=20, flags=G2D.V_EXPAND,
+                                    create_row=lambda: Label(), bind_row=lambda row, i: setattr(row, 'text', "x" * (i % 7 + 1)))
+        panel.add_child(rows)
+        box.add_child(panel)
+        tree.set_root(box)
+        tree.flush_layouts()
+        box.layouts = 0
+        for i in range(10):
+            rows.scroll_to(rows.scroll_offset + 30)
+            # scroll_to has laid out the rows already
+            self.assertFalse(rows._layout_pending)
+            tree.flush_layouts()
+        self.assertEqual(box.layouts, 0)
+        self.assertFalse(panel._layout_pending)
+
+    def test_free_rows_are_not_updated(self):
+        tree = SceneTree()
+        rows = VirtualListContainer(size=Vector2(100, 100), item_count=1000, row_height=10,
+                                    create_row=UpdatingRow, bind_row=bind_row)
+        tree.set_root(rows)
+        tree.flush_layouts()
+        # a shorter list needs fewer rows
+        rows.on_resized(100, 50)
+        free = rows._free_rows
+        self.assertEqual(len(free), 5)
+        tree.perform_updates(16)
+        self.assertEqual([row.updates for row in free], [0] * 5)
+        self.assertTrue(all(row.updates == 1 for row in rows._active_rows.values()))
+        rows.on_resized(100, 100)
+        self.assertEqual(len(tree._get_update_order()), 10)
+
+
+class TestVirtualListInWindow(unittest.TestCase):
+
+    def setUp(self):
+        framework.settings['HEADLESS'] = True
+        framework.settings['WIDTH'] = 100
+        framework.settings['HEIGHT'] = 100
+        go()
+
+    def tearDown(self):
+        shutdown()
+        framework.settings['HEADLESS'] = False
+
+    def test_drawing_and_mouse_wheel(self):
+        rows = VirtualListContainer(size=(100, 100), item_count=1000, row_height=10,
+                                    create_row=create_row, bind_row=bind_row)
+        get_scenetree().set_root(rows)
+        run_frames(1)
+        self.assertEqual(get_window_surface().get_at((50, 35)), Color(3, 0, 0))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=-1))
+        run_frames(1)
+        self.assertEqual(rows.scroll_offset, 60)
+        self.assertEqual(get_window_surface().get_at((50, 35)), Color(9, 0, 0))
+        rows.scroll_to(65)
+        run_frames(1)
+        # the partly visible top row
+        self.assertEqual(get_window_surface().get_at((50, 2)), Color(6, 0, 0))
+        self.assertEqual(get_window_surface().get_at((50, 7)), Color(7, 0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()